@@ -1,14 +1,14 @@
 import streamlit as st
 import os
+import time
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.tools import Tool
-from langchain.memory import ConversationBufferMemory
 import json
-from utils.file_handler import FileHandler
-from agents.resume_agent import ResumeAgent
+from utils.model_router import ModelRouter, DEFAULT_ROUTES
+from utils.resilience import Resilience, FAILURE_CAUSES
+from utils.stage_dag import StageGraph, StageCancelled
+from utils.text_processor import TextProcessor
+from utils.near_duplicates import NearDuplicateCache
+from agents.resume_agent import ResumeAgent, ANALYSIS_KEYS, validate_section
 from agents.cover_letter_agent import CoverLetterAgent
 from io import BytesIO
 
@@ -29,15 +29,100 @@ if 'cover_letter' not in st.session_state:
     st.session_state.cover_letter = None
 if 'raw_llm_output' not in st.session_state:
     st.session_state.raw_llm_output = {}
+if 'active_graph' not in st.session_state:
+    st.session_state.active_graph = None
+if 'analysis_cache' not in st.session_state:
+    st.session_state.analysis_cache = None
 
-def initialize_llm():
-    """Initialize the language model."""
+def initialize_llm(config: dict):
+    """Initialize the language model for one route configuration."""
+    # Imported on first use: the OpenAI client stack is slow to import and
+    # Streamlit re-executes this script on every interaction
+    from langchain_openai import ChatOpenAI
     return ChatOpenAI(
-        model="gpt-4-turbo-preview",
-        temperature=0.7,
-        api_key=os.getenv("OPENAI_API_KEY")
+        model=config["model"],
+        temperature=config["temperature"],
+        api_key=os.getenv("OPENAI_API_KEY"),
+        # Bounds how long an abandoned hedge, timed-out call or cancelled run keeps the provider busy
+        timeout=float(os.getenv("LLM_TIMEOUT", "60"))
     )
 
+@st.cache_resource
+def initialize_router() -> ModelRouter:
+    """Initialize the per-stage model router, shared by all sessions.
+    
+    Sharing it lets route latencies (used for hedging and deadlines) and
+    circuit breaker state build up from everyone's calls, not per visitor.
+    
+    MODEL_NAME and TEMPERATURE set the default for unrouted stages; MODEL_ROUTES
+    may hold a JSON object of per-stage overrides, e.g.
+    {"extract_skills": {"model": "gpt-4o-mini", "temperature": 0}}.
+    LLM_TIMEOUT, STAGE_TIMEOUTS, HEDGE_PERCENTILE and BREAKER_FAILURES
+    configure timeouts, hedged requests and the circuit breaker.
+    """
+    routes = dict(DEFAULT_ROUTES)
+    routes.update(json.loads(os.getenv("MODEL_ROUTES", "{}")))
+    default = {
+        "model": os.getenv("MODEL_NAME", "gpt-4-turbo-preview"),
+        "temperature": float(os.getenv("TEMPERATURE", "0.7"))
+    }
+    hedge_percentile = os.getenv("HEDGE_PERCENTILE", "95")
+    resilience = Resilience(
+        timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+        stage_timeouts=json.loads(os.getenv("STAGE_TIMEOUTS", "{}")),
+        hedge_percentile=float(hedge_percentile) if hedge_percentile else None,
+        failure_threshold=int(os.getenv("BREAKER_FAILURES", "5"))
+    )
+    return ModelRouter(routes, default, initialize_llm, resilience)
+
+@st.cache_resource
+def get_job_profile_cache() -> NearDuplicateCache:
+    """Near-duplicate cache of job requirements, shared by all sessions.
+    
+    Reposted job descriptions with small edits reuse the extracted profile.
+    """
+    threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+    return NearDuplicateCache(TextProcessor(), threshold=threshold)
+
+def get_analysis_cache() -> NearDuplicateCache:
+    """Near-duplicate cache of full (resume, job description) results for this session.
+    
+    Both the resume and the job description must be near-duplicates to reuse a result.
+    """
+    if st.session_state.analysis_cache is None:
+        threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+        st.session_state.analysis_cache = NearDuplicateCache(
+            get_job_profile_cache().text_processor, threshold=threshold
+        )
+    return st.session_state.analysis_cache
+
+def build_pipeline(router: ModelRouter, resume_text: str, job_description: str, known_sections: dict = None,
+                   deadline_at: float = None):
+    """Declare the stages of both agents on one graph so independent stages overlap.
+    
+    The cover letter only needs the raw resume and job description, so it runs
+    alongside the resume analysis instead of after it.
+    """
+    graph = StageGraph()
+    resume_agent = ResumeAgent(
+        router,
+        combined_extraction=os.getenv("COMBINED_EXTRACTION", "false").lower() == "true"
+    )
+    resume_agent.add_stages(graph, resume_text, job_description, known_sections, deadline_at)
+    cover_letter_agent = CoverLetterAgent(router)
+    cover_letter_agent.add_stages(graph, resume_text, job_description)
+    return graph, resume_agent, cover_letter_agent
+
+def stage_timings(graph: StageGraph) -> dict:
+    """Summarize queueing and run time per stage, in seconds."""
+    return {
+        name: {
+            "queued": round(t["started"] - t["queued"], 4),
+            "ran": round(t["finished"] - t["started"], 4)
+        }
+        for name, t in graph.timings.items() if "finished" in t
+    }
+
 def make_serializable(obj):
     """Recursively convert objects to serializable types for JSON serialization."""
     if isinstance(obj, list):
@@ -63,6 +148,192 @@ def create_cover_letter_doc(cover_letter: str) -> BytesIO:
     buffer.seek(0)
     return buffer
 
+def create_result_tabs() -> dict:
+    """Lay out the result tabs with an empty slot per section, so each can be drawn as soon as it arrives."""
+    st.subheader("Analysis Results")
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "Resume Analysis",
+        "Job Analysis",
+        "Cover Letter",
+        "Fit Evaluation"
+    ])
+    slots = {}
+    with tab1:
+        st.write("Resume Analysis Results")
+        slots["skills_analysis"] = st.empty()
+        slots["experience_analysis"] = st.empty()
+        slots["tailored_bullets"] = st.empty()
+        slots["fit_summary"] = st.empty()
+    with tab2:
+        st.write("Job Analysis Results")
+        slots["job_requirements"] = st.empty()
+    with tab3:
+        slots["cover_letter"] = st.empty()
+    with tab4:
+        st.write("Fit Evaluation")
+        slots["fit_analysis"] = st.empty()
+    return slots
+
+def render_section(slots: dict, key: str, value) -> None:
+    """Draw one analysis section into its slot, replacing any earlier version."""
+    if key == "skills_analysis":
+        with slots[key].container():
+            st.subheader("Skills Analysis")
+            st.write("Technical Skills:", value.get("technical_skills", []))
+            st.write("Soft Skills:", value.get("soft_skills", []))
+            st.write("Tools & Technologies:", value.get("tools_and_technologies", []))
+    elif key == "experience_analysis":
+        with slots[key].container():
+            st.subheader("Experience Analysis")
+            for exp in value:
+                st.markdown(f"**{exp.get('title', '')} at {exp.get('company', '')}** ({exp.get('dates', '')})")
+                for resp in exp.get("responsibilities", []):
+                    st.write("-", resp)
+    elif key == "tailored_bullets":
+        with slots[key].container():
+            st.subheader("Tailored Bullet Points")
+            for bullet in value:
+                st.write("-", bullet)
+    elif key == "job_requirements":
+        with slots[key].container():
+            st.subheader("Required Skills")
+            st.write(value.get("required_skills", []))
+            st.subheader("Preferred Skills")
+            st.write(value.get("preferred_skills", []))
+            st.subheader("Responsibilities")
+            st.write(value.get("responsibilities", []))
+            st.subheader("Qualifications")
+            st.write(value.get("qualifications", []))
+    elif key == "fit_analysis":
+        # Strengths and areas for improvement also appear on the resume tab
+        with slots["fit_summary"].container():
+            st.subheader("Strengths")
+            for s in value.get("strengths", []):
+                st.write("-", s)
+            st.subheader("Areas for Improvement")
+            for a in value.get("areas_for_improvement", []):
+                st.write("-", a)
+        with slots[key].container():
+            st.subheader("Fit Score")
+            st.write("Overall Score:", value.get("overall_score", ""))
+            st.write("Skills Match:", value.get("skills_match", ""))
+            st.write("Experience Match:", value.get("experience_match", ""))
+            st.subheader("Missing Requirements")
+            st.write(value.get("missing_requirements", []))
+            st.subheader("Strengths")
+            st.write(value.get("strengths", []))
+            st.subheader("Areas for Improvement")
+            st.write(value.get("areas_for_improvement", []))
+
+def render_cover_letter(slot, cover_letter: str, downloadable: bool = True) -> None:
+    """Draw the cover letter into its slot; the download button is added once the run is over."""
+    with slot.container():
+        if cover_letter:
+            st.subheader("Generated Cover Letter")
+            st.write(cover_letter)
+            if downloadable:
+                # Download button for cover letter only (in-memory)
+                word_buffer = create_cover_letter_doc(cover_letter)
+                st.download_button(
+                    label="Download Cover Letter as Word",
+                    data=word_buffer,
+                    file_name="cover_letter.docx",
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                )
+        else:
+            st.info("No cover letter generated yet.")
+
+def run_analysis(resume_text: str, job_description: str, analysis_cache: NearDuplicateCache, slots: dict) -> bool:
+    """Run both agents for new inputs, drawing sections into the result slots as they finish."""
+    with st.spinner("Analyzing and generating content..."):
+        graph = None
+        try:
+            job_profile_cache = get_job_profile_cache()
+            known_sections = {}
+            job_profile = job_profile_cache.lookup(job_description)
+            if job_profile is not None:
+                known_sections["job_requirements"] = job_profile["payload"]
+                st.session_state.raw_llm_output['job_profile_reuse'] = job_profile["audit"]
+
+            deadline = os.getenv("ANALYSIS_DEADLINE")
+            deadline_at = time.perf_counter() + float(deadline) if deadline else None
+            graph, resume_agent, cover_letter_agent = build_pipeline(
+                initialize_router(), resume_text, job_description, known_sections, deadline_at
+            )
+            st.session_state.active_graph = graph
+            progress = st.empty()
+            started = time.perf_counter()
+            # Updating the page, also while a call is in flight, lets Streamlit interrupt
+            # this run when the user edits the inputs or leaves; the finally block cancels it
+            for name, result in graph.iter_run(deadline_at, heartbeat=True):
+                if name is None:
+                    progress.caption(f"Working... {time.perf_counter() - started:.0f}s "
+                                     f"({len(graph.results)}/{len(graph.stages)} stages)")
+                    continue
+                for key, value, _ in resume_agent.stage_updates(name, result):
+                    render_section(slots, key, value)
+                if name == "cover_letter":
+                    render_cover_letter(slots["cover_letter"], (result or {}).get("cover_letter", ""), downloadable=False)
+                progress.caption(f"Finished {name} ({len(graph.results)}/{len(graph.stages)} stages)")
+            progress.empty()
+
+            result, completeness = resume_agent.collect_results(graph)
+            cover_letter_result = graph.results.get("cover_letter")
+            completeness["cover_letter"] = "missing" if cover_letter_result is None else "complete"
+            incomplete = {key: status for key, status in completeness.items() if status != "complete"}
+            # Stages whose call failed transiently left their section incomplete (refinement: every
+            # section unrefined); the rest were cut short by the deadline
+            stage_errors = {**resume_agent.stage_errors, **cover_letter_agent.stage_errors}
+            failed = {name: cause for name, cause in stage_errors.items() if name in completeness or name == "refined_analysis"}
+            shortened = {
+                key: status for key, status in incomplete.items()
+                if key not in failed and not (status == "unrefined" and "refined_analysis" in failed)
+            }
+            st.session_state.analysis_results = result
+            st.session_state.raw_llm_output['resume'] = result
+            st.session_state.raw_llm_output['resume_stats'] = {
+                "llm_calls": resume_agent.llm_calls,
+                "wall_clock_seconds": graph.wall_clock_seconds(),
+                "deadline_expired": graph.expired,
+                "completeness": completeness,
+                "stage_errors": stage_errors,
+                "stages": stage_timings(graph)
+            }
+            st.session_state.cover_letter = (cover_letter_result or {}).get("cover_letter", "")
+            st.session_state.raw_llm_output['cover_letter'] = cover_letter_result
+            if failed:
+                st.warning("Some sections could not be generated: " +
+                           ", ".join(f"{name} ({FAILURE_CAUSES[cause]})" for name, cause in failed.items()))
+            if shortened:
+                st.warning("Some sections were shortened to meet the response deadline: " +
+                           ", ".join(f"{key} ({status})" for key, status in shortened.items()))
+
+            # Partial results are shown but never reused for later submissions
+            if not incomplete:
+                analysis_cache.store(
+                    {"analysis": result, "cover_letter": st.session_state.cover_letter},
+                    resume_text, job_description
+                )
+            # Only a profile the model actually produced is shared; failed or degraded ones would be reused as empty
+            job_requirements = graph.results.get("job_requirements")
+            if ("job_requirements" not in known_sections
+                    and completeness["job_requirements"] not in ("missing", "local")
+                    and validate_section("job_requirements", job_requirements)):
+                job_profile_cache.store(job_requirements, job_description)
+        except StageCancelled:
+            st.info("The previous run was cancelled.")
+            return False
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+            return False
+        finally:
+            if graph is not None:
+                if len(graph.results) < len(graph.stages):
+                    graph.cancel()
+                if st.session_state.active_graph is graph:
+                    st.session_state.active_graph = None
+    return True
+
 def main():
     """Main Streamlit app logic."""
     st.title("AI Resume Tailoring Assistant")
@@ -90,113 +361,40 @@ def main():
     # Debug toggle
     show_debug = st.sidebar.checkbox("Show raw LLM output (debug)")
 
+    # Result slots, created before a run so sections can appear as they finish
+    slots = None
+
     # Generate button
     if st.button("Generate Tailored Content", type="primary"):
         if not resume_text or not job_description:
             st.error("Please provide both resume and job description")
             return
 
-        with st.spinner("Analyzing and generating content..."):
-            try:
-                llm = initialize_llm()
-                resume_agent = ResumeAgent(llm)
-                result = resume_agent.analyze_resume(resume_text, job_description)
-                st.session_state.analysis_results = result
-                st.session_state.raw_llm_output['resume'] = result
-                # Generate cover letter
-                cover_letter_agent = CoverLetterAgent(llm)
-                cover_letter_result = cover_letter_agent._generate_cover_letter(resume_text, job_description)
-                st.session_state.cover_letter = cover_letter_result.get("cover_letter", "")
-                st.session_state.raw_llm_output['cover_letter'] = cover_letter_result
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
+        # A run still going for older inputs is stale; stop it before starting a new one
+        if st.session_state.active_graph is not None:
+            st.session_state.active_graph.cancel()
+
+        # A lightly edited resubmission reuses the earlier result, flagged for audit
+        analysis_cache = get_analysis_cache()
+        reused = analysis_cache.lookup(resume_text, job_description)
+        if reused is not None:
+            st.session_state.analysis_results = reused["payload"]["analysis"]
+            st.session_state.cover_letter = reused["payload"]["cover_letter"]
+            st.session_state.raw_llm_output['near_duplicate'] = reused["audit"]
+            st.info(f"Reused the analysis of a near-identical submission (similarity {reused['audit']['similarity']}).")
+        else:
+            slots = create_result_tabs()
+            if not run_analysis(resume_text, job_description, analysis_cache, slots):
                 return
 
     # Display results if available
     if st.session_state.analysis_results:
-        st.subheader("Analysis Results")
-        
-        # Create tabs for different sections
-        tab1, tab2, tab3, tab4 = st.tabs([
-            "Resume Analysis",
-            "Job Analysis",
-            "Cover Letter",
-            "Fit Evaluation"
-        ])
-        
-        with tab1:
-            st.write("Resume Analysis Results")
-            results = st.session_state.analysis_results
-
-            # Skills Analysis
-            skills = results.get("skills_analysis", {})
-            st.subheader("Skills Analysis")
-            st.write("Technical Skills:", skills.get("technical_skills", []))
-            st.write("Soft Skills:", skills.get("soft_skills", []))
-            st.write("Tools & Technologies:", skills.get("tools_and_technologies", []))
-
-            # Experience Analysis
-            st.subheader("Experience Analysis")
-            for exp in results.get("experience_analysis", []):
-                st.markdown(f"**{exp.get('title', '')} at {exp.get('company', '')}** ({exp.get('dates', '')})")
-                for resp in exp.get("responsibilities", []):
-                    st.write("-", resp)
-
-            # Tailored Bullets
-            st.subheader("Tailored Bullet Points")
-            for bullet in results.get("tailored_bullets", []):
-                st.write("-", bullet)
-
-            # Strengths and Areas for Improvement
-            fit = results.get("fit_analysis", {})
-            st.subheader("Strengths")
-            for s in fit.get("strengths", []):
-                st.write("-", s)
-            st.subheader("Areas for Improvement")
-            for a in fit.get("areas_for_improvement", []):
-                st.write("-", a)
-
-        with tab2:
-            st.write("Job Analysis Results")
-            job = results.get("job_requirements", {})
-            st.subheader("Required Skills")
-            st.write(job.get("required_skills", []))
-            st.subheader("Preferred Skills")
-            st.write(job.get("preferred_skills", []))
-            st.subheader("Responsibilities")
-            st.write(job.get("responsibilities", []))
-            st.subheader("Qualifications")
-            st.write(job.get("qualifications", []))
-
-        with tab3:
-            # Show the generated cover letter
-            cover_letter = st.session_state.cover_letter
-            if cover_letter:
-                st.subheader("Generated Cover Letter")
-                st.write(cover_letter)
-                # Download button for cover letter only (in-memory)
-                word_buffer = create_cover_letter_doc(cover_letter)
-                st.download_button(
-                    label="Download Cover Letter as Word",
-                    data=word_buffer,
-                    file_name="cover_letter.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
-            else:
-                st.info("No cover letter generated yet.")
-
-        with tab4:
-            st.write("Fit Evaluation")
-            st.subheader("Fit Score")
-            st.write("Overall Score:", fit.get("overall_score", ""))
-            st.write("Skills Match:", fit.get("skills_match", ""))
-            st.write("Experience Match:", fit.get("experience_match", ""))
-            st.subheader("Missing Requirements")
-            st.write(fit.get("missing_requirements", []))
-            st.subheader("Strengths")
-            st.write(fit.get("strengths", []))
-            st.subheader("Areas for Improvement")
-            st.write(fit.get("areas_for_improvement", []))
+        if slots is None:
+            slots = create_result_tabs()
+        results = st.session_state.analysis_results
+        for key in ANALYSIS_KEYS:
+            render_section(slots, key, results.get(key, [] if key in ("experience_analysis", "tailored_bullets") else {}))
+        render_cover_letter(slots["cover_letter"], st.session_state.cover_letter)
 
     # Show warnings if results are empty
     if st.session_state.analysis_results is None:
@@ -208,6 +406,11 @@ def main():
     if show_debug:
         st.subheader("Raw LLM Output (Debug)")
         st.write(st.session_state.raw_llm_output)
+        router = initialize_router()
+        st.subheader("Per-Stage Model Latency (all sessions)")
+        st.write(router.latency_summary())
+        st.subheader("Hedges, Timeouts and Circuit Breakers (all sessions)")
+        st.write(router.resilience.summary())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import tracemalloc
+from utils.file_handler import FileHandler
+
+def measure(extract, data: bytes, repeat: int):
+    """Return (text, best seconds, peak traced bytes) for one extractor on one file."""
+    best = float('inf')
+    text = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract(data)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    extract(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text or "", best, peak
+
+def compare(directory: str, repeat: int = 3) -> None:
+    """Compare the python-docx and streaming extractors on every DOCX in a directory."""
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory)
+        for name in files if name.lower().endswith('.docx')
+    )
+    if not paths:
+        print(f"No .docx files found in {directory}")
+        return
+
+    print(f"{'file':40} {'docx ms':>9} {'stream ms':>9} {'speedup':>8} {'docx KB':>8} {'stream KB':>9} {'missing':>8} {'extra chars':>11}")
+    totals = [0.0, 0.0]
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        old_text, old_s, old_peak = measure(FileHandler.extract_text_from_docx, data, repeat)
+        new_text, new_s, new_peak = measure(FileHandler.extract_text_from_docx_fast, data, repeat)
+        totals[0] += old_s
+        totals[1] += new_s
+
+        # Every non-empty body paragraph from the old method should appear in the new output
+        new_lines = set(new_text.splitlines())
+        missing = sum(1 for line in old_text.splitlines() if line.strip() and line not in new_lines)
+        print(f"{os.path.basename(path)[:40]:40} {old_s * 1000:9.2f} {new_s * 1000:9.2f} "
+              f"{old_s / new_s if new_s else 0:7.1f}x {old_peak / 1024:8.0f} {new_peak / 1024:9.0f} "
+              f"{missing:8d} {len(new_text) - len(old_text):11d}")
+
+    print(f"\n{len(paths)} files: python-docx {totals[0]:.3f}s, streaming {totals[1]:.3f}s "
+          f"({totals[0] / totals[1] if totals[1] else 0:.1f}x)")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python bench_docx_extract.py <directory-of-docx-files> [repeat]")
+        sys.exit(1)
+    compare(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 3)
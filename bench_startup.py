@@ -0,0 +1,127 @@
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Cold-start budget per module: cumulative import time in milliseconds, excluding Streamlit itself.
+# Set with headroom for machine noise; eagerly importing LangChain or NLTK alone costs 0.5-2 s.
+BUDGET_MS = {
+    "utils.file_handler": 60,
+    "utils.text_processor": 60,
+    "agents.resume_agent": 100,
+    "agents.cover_letter_agent": 100,
+    "app": 250,
+}
+
+# Heavy packages that must only be imported on first use, never at module load
+LAZY_PACKAGES = ("langchain", "langchain_core", "langchain_community", "langchain_openai",
+                 "openai", "nltk", "docx", "PyPDF2")
+
+# The UI framework's own import cost is reported but not budgeted
+EXCLUDED_PACKAGES = ("streamlit",)
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+def import_profile(module: str) -> List[Tuple[int, str, int, int]]:
+    """Import a module in a fresh interpreter with -X importtime and return (depth, name, self us, cumulative us)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((len(indent) // 2, name, int(self_us), int(cumulative_us)))
+    return entries
+
+def _root(name: str) -> str:
+    return name.split('.')[0]
+
+def _excluded_flags(entries: List[Tuple[int, str, int, int]]) -> Tuple[List[bool], List[bool]]:
+    """Mark entries inside an excluded package, and entries whose importer is inside one.
+
+    importtime prints children before their parent, so an entry's parent is
+    the next later entry with a smaller depth.
+    """
+    inside = [False] * len(entries)
+    parent_inside = [False] * len(entries)
+    for i in range(len(entries) - 1, -1, -1):
+        depth = entries[i][0]
+        for j in range(i + 1, len(entries)):
+            if entries[j][0] < depth:
+                parent_inside[i] = inside[j]
+                break
+        inside[i] = parent_inside[i] or _root(entries[i][1]) in EXCLUDED_PACKAGES
+    return inside, parent_inside
+
+def _target_flags(entries: List[Tuple[int, str, int, int]], module: str) -> List[bool]:
+    """Mark entries imported (directly or not) by the target module's own top-level imports."""
+    flags = [False] * len(entries)
+    current_top = ""
+    for i in range(len(entries) - 1, -1, -1):
+        depth, name, _, _ = entries[i]
+        if depth == 0:
+            current_top = name
+        flags[i] = _root(current_top) == _root(module)
+    return flags
+
+def check_module(module: str, budget_ms: float, repeat: int = 3) -> Dict:
+    """Measure a module's cold import (best of several runs) against its budget."""
+    best = None
+    for _ in range(repeat):
+        entries = import_profile(module)
+        excluded, parent_excluded = _excluded_flags(entries)
+        target = _target_flags(entries, module)
+        # Only the target's own top-level imports; interpreter start-up (site, encodings) is not ours
+        total_us = sum(cum for depth, name, _, cum in entries if depth == 0 and _root(name) == _root(module))
+        # Count each excluded subtree once, at its outermost entry
+        excluded_us = sum(
+            cum for (_, _, _, cum), inside, parent in zip(entries, excluded, parent_excluded)
+            if inside and not parent
+        )
+        budgeted_ms = (total_us - excluded_us) / 1000.0
+        if best is None or budgeted_ms < best["budgeted_ms"]:
+            best = {
+                "module": module,
+                "budget_ms": budget_ms,
+                "budgeted_ms": round(budgeted_ms, 1),
+                "excluded_ms": round(excluded_us / 1000.0, 1),
+                "eager_heavy_imports": sorted({
+                    name for (_, name, _, _), flag, ours in zip(entries, excluded, target)
+                    if ours and not flag and _root(name) in LAZY_PACKAGES and '.' not in name
+                }),
+                "slowest": sorted(
+                    ((name, self_us) for (_, name, self_us, _), flag, ours in zip(entries, excluded, target)
+                     if ours and not flag),
+                    key=lambda item: item[1], reverse=True
+                )[:8],
+            }
+    best["ok"] = best["budgeted_ms"] <= budget_ms and not best["eager_heavy_imports"]
+    return best
+
+def main(modules: List[str]) -> int:
+    """Print an import-time report for each module and return 1 if any budget is exceeded."""
+    failures = 0
+    for module in modules:
+        try:
+            report = check_module(module, BUDGET_MS.get(module, 50))
+        except RuntimeError as e:
+            print(f"FAIL {module}: {e}")
+            failures += 1
+            continue
+        status = "OK  " if report["ok"] else "FAIL"
+        print(f"{status} {module}: {report['budgeted_ms']} ms (budget {report['budget_ms']} ms, "
+              f"+{report['excluded_ms']} ms excluded framework)")
+        if report["eager_heavy_imports"]:
+            print(f"     imported at load, should be lazy: {', '.join(report['eager_heavy_imports'])}")
+        for name, self_us in report["slowest"]:
+            print(f"     {self_us / 1000.0:8.1f} ms  {name}")
+        failures += not report["ok"]
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or list(BUDGET_MS)))
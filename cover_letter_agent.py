@@ -1,9 +1,15 @@
-from langchain.tools import Tool
-from langchain.prompts import ChatPromptTemplate
-from langchain.chains import LLMChain
-from typing import Dict
+from typing import Dict, Optional
 import re
+import time
 import json5
+from utils.model_router import ModelRouter
+from utils.resilience import transient_cause
+from utils.stage_dag import StageGraph, StageCancelled, run_cancellable
+
+def _prompt(template: str):
+    """Build a chat prompt template, importing LangChain on first use."""
+    from langchain.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(template)
 
 def extract_json_with_key(text, required_key):
     """Extract the first JSON object containing the required key from the text, after stripping markdown code fences."""
@@ -29,15 +35,53 @@ def extract_json_with_key(text, required_key):
     print(f"DEBUG: No JSON object with key '{required_key}' found!")
     return {}
 
+# Passes applied to the first draft, in order: (result name, route, key of the letter in the output)
+LETTER_STEPS = (
+    ("ats_optimized", "optimize_cover_letter", "optimized_letter"),
+    ("tone_refined", "refine_tone", "refined_letter"),
+    ("enhanced", "enhance_impact", "enhanced_letter"),
+)
+
+# Key of the letter in each pass's output, first draft included
+LETTER_KEYS = dict([("initial_cover_letter", "cover_letter")] + [(name, key) for name, _, key in LETTER_STEPS])
+
+def _latest_letter(results: Dict, names) -> str:
+    """The most recent letter among the named passes that produced one, or ''."""
+    for name in reversed(list(names)):
+        letter = (results.get(name) or {}).get(LETTER_KEYS[name])
+        if letter:
+            return letter
+    return ""
+
 class CoverLetterAgent:
     """Agent for generating and optimizing cover letters using an LLM."""
-    def __init__(self, llm):
-        """Initialize with a language model."""
-        self.llm = llm
-        self.tools = self._create_tools()
+    def __init__(self, router):
+        """Initialize with a ModelRouter (or a single language model used for every stage)."""
+        self.router = router if isinstance(router, ModelRouter) else ModelRouter.single(router)
+        self.cancel_event = None
+        self.deadline_at = None
+        self.stage_errors: Dict[str, str] = {}
+        self._tools = None
+    
+    def _run_chain(self, route: str, prompt, **inputs) -> str:
+        """Run a prompt on the model routed for this stage and time the call; cancelling the run or the attempt abandons it in flight."""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise StageCancelled(route)
+        from langchain.chains import LLMChain
+        chain = LLMChain(llm=self.router.get(route), prompt=prompt)
+        return self.router.invoke(route, lambda cancel: run_cancellable(lambda: chain.arun(**inputs), cancel),
+                                  self.cancel_event)
     
-    def _create_tools(self) -> list[Tool]:
+    @property
+    def tools(self) -> list:
+        """LangChain tools for this agent, built on first access."""
+        if self._tools is None:
+            self._tools = self._create_tools()
+        return self._tools
+    
+    def _create_tools(self) -> list:
         """Create tools for cover letter generation and optimization."""
+        from langchain.tools import Tool
         return [
             Tool(
                 name="generate_cover_letter",
@@ -63,7 +107,7 @@ class CoverLetterAgent:
     
     def _generate_cover_letter(self, resume_text: str, job_description: str) -> Dict:
         """Generate a personalized cover letter."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Generate a professional cover letter based on the resume and job description.
             The cover letter should be personalized, highlight relevant experience,
             and demonstrate enthusiasm for the position.
@@ -89,13 +133,12 @@ class CoverLetterAgent:
             """
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(resume_text=resume_text, job_description=job_description)
+        result = self._run_chain('generate_cover_letter', prompt, resume_text=resume_text, job_description=job_description)
         return extract_json_with_key(result, 'cover_letter')
     
     def _optimize_cover_letter(self, cover_letter: str, job_description: str) -> Dict:
         """Optimize the cover letter for ATS and readability."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Optimize the following cover letter for ATS systems and readability.
             Ensure it includes relevant keywords from the job description while maintaining
             a natural flow and professional tone.
@@ -125,13 +168,12 @@ class CoverLetterAgent:
             """
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(cover_letter=cover_letter, job_description=job_description)
-        return extract_json_with_key(result, 'cover_letter')
+        result = self._run_chain('optimize_cover_letter', prompt, cover_letter=cover_letter, job_description=job_description)
+        return extract_json_with_key(result, 'optimized_letter')
     
     def _refine_tone(self, cover_letter: str, job_description: str) -> Dict:
         """Refine the tone and style of the cover letter."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Refine the tone and style of the following cover letter to better match the company culture
             and job requirements. Make it more engaging and professional while maintaining authenticity.
             Return ONLY the following JSON object, with no explanation, markdown, or extra text.
@@ -159,13 +201,12 @@ class CoverLetterAgent:
             """
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(cover_letter=cover_letter, job_description=job_description)
-        return extract_json_with_key(result, 'cover_letter')
+        result = self._run_chain('refine_tone', prompt, cover_letter=cover_letter, job_description=job_description)
+        return extract_json_with_key(result, 'refined_letter')
     
     def _enhance_impact(self, cover_letter: str, resume_text: str) -> Dict:
         """Enhance the impact of key achievements and qualifications."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Enhance the impact of key achievements and qualifications in the cover letter
             by making them more specific, measurable, and relevant to the position.
             Return ONLY the following JSON object, with no explanation, markdown, or extra text.
@@ -195,36 +236,111 @@ class CoverLetterAgent:
             """
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(cover_letter=cover_letter, resume_text=resume_text)
-        return extract_json_with_key(result, 'cover_letter')
+        result = self._run_chain('enhance_impact', prompt, cover_letter=cover_letter, resume_text=resume_text)
+        return extract_json_with_key(result, 'enhanced_letter')
     
-    def generate_optimized_cover_letter(self, resume_text: str, job_description: str) -> Dict:
-        """Generate and optimize a cover letter through multiple refinement steps."""
-        # Generate initial cover letter
-        initial_letter = self._generate_cover_letter(resume_text, job_description)
+    def add_stages(self, graph: StageGraph, resume_text: str, job_description: str) -> str:
+        """Declare the cover letter stage on a StageGraph and return its name.
         
-        # Optimize for ATS
-        optimized = self._optimize_cover_letter(initial_letter["cover_letter"], job_description)
+        It needs only the raw resume and job description, so it runs
+        alongside the resume analysis rather than after it. Its result is
+        None if the call failed transiently (see stage_errors for the cause).
+        """
+        self.cancel_event = graph.cancel_event
+        self.stage_errors = {}
+        graph.add("cover_letter", lambda results: self._draft_stage(resume_text, job_description))
+        return "cover_letter"
+    
+    def _letter_step(self, name: str, route: str, letter: str,
+                     resume_text: str, job_description: str) -> Optional[Dict]:
+        """Run one pass over the latest draft, or return None if it was skipped, failed transiently or would overrun the deadline."""
+        if not letter or not self.router.fits(route, self.deadline_at):
+            return None
+        try:
+            if name == "ats_optimized":
+                return self._optimize_cover_letter(letter, job_description)
+            if name == "tone_refined":
+                return self._refine_tone(letter, job_description)
+            return self._enhance_impact(letter, resume_text)
+        except Exception as e:
+            self._stage_failed(name, e)
+            return None
+    
+    def _draft_stage(self, resume_text: str, job_description: str, name: str = "cover_letter") -> Optional[Dict]:
+        """Generate the first draft, or return None if the call timed out, hit a provider error or the circuit is open."""
+        try:
+            return self._generate_cover_letter(resume_text, job_description)
+        except Exception as e:
+            self._stage_failed(name, e)
+            return None
+    
+    def _stage_failed(self, name: str, error: Exception) -> None:
+        """Record why a pass's call failed if the failure is transient; re-raise any other error."""
+        cause = transient_cause(error)
+        if cause is None:
+            raise error
+        print(f"DEBUG: {name} failed ({cause}):", error)
+        self.stage_errors[name] = cause
+    
+    def generate_optimized_cover_letter(self, resume_text: str, job_description: str,
+                                        deadline: Optional[float] = None) -> Dict:
+        """Generate and optimize a cover letter through multiple refinement steps.
         
-        # Refine tone
-        tone_refined = self._refine_tone(optimized["optimized_letter"], job_description)
+        With a deadline (seconds from now), a pass that would not finish in
+        time based on its route's recorded p95 latency is skipped along with
+        the passes after it, and the latest finished draft is returned. A
+        pass whose reply cannot be parsed, or whose call failed transiently,
+        is marked failed and the next pass works on the latest good draft.
+        The "completeness" entry marks each pass complete, failed, skipped or
+        missing (cut off by the deadline); stage_errors has the cause of each
+        transient failure.
+        """
+        deadline_at = None if deadline is None else time.perf_counter() + deadline
+        self.deadline_at = deadline_at
+        self.stage_errors = {}
+        graph = StageGraph()
+        self.cancel_event = graph.cancel_event
+        graph.add("initial_cover_letter",
+                  lambda results: self._draft_stage(resume_text, job_description, "initial_cover_letter"))
+        earlier = ["initial_cover_letter"]
+        for name, route, _ in LETTER_STEPS:
+            graph.add(
+                name,
+                lambda results, name=name, route=route, earlier=tuple(earlier): self._letter_step(
+                    name, route, _latest_letter(results, earlier), resume_text, job_description
+                ),
+                deps=list(earlier)
+            )
+            earlier.append(name)
+        results = graph.run(deadline_at)
         
-        # Enhance impact
-        final_letter = self._enhance_impact(tone_refined["refined_letter"], resume_text)
+        completeness = {}
+        for name, key in LETTER_KEYS.items():
+            if name not in results:
+                completeness[name] = "missing"
+            elif results[name] is None:
+                completeness[name] = "failed" if name in self.stage_errors else "skipped"
+            else:
+                completeness[name] = "complete" if results[name].get(key) else "failed"
+        final_letter = _latest_letter(results, LETTER_KEYS)
         
+        initial_letter = results.get("initial_cover_letter") or {}
+        optimized = results.get("ats_optimized") or {}
+        tone_refined = results.get("tone_refined") or {}
+        enhanced = results.get("enhanced") or {}
         return {
             "initial_cover_letter": initial_letter,
             "ats_optimized": optimized,
             "tone_refined": tone_refined,
-            "final_letter": final_letter["enhanced_letter"],
+            "final_letter": final_letter,
             "analysis": {
-                "tone_analysis": tone_refined["tone_analysis"],
-                "key_achievements": final_letter["key_achievements"],
+                "tone_analysis": tone_refined.get("tone_analysis", {}),
+                "key_achievements": enhanced.get("key_achievements", []),
                 "improvements": {
-                    "ats": optimized["improvements_made"],
-                    "tone": tone_refined["style_improvements"],
-                    "impact": final_letter["improvements_made"]
+                    "ats": optimized.get("improvements_made", []),
+                    "tone": tone_refined.get("style_improvements", []),
+                    "impact": enhanced.get("improvements_made", [])
                 }
-            }
+            },
+            "completeness": completeness
         } 
\ No newline at end of file
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models.llms import LLM
+from langchain_core.pydantic_v1 import PrivateAttr
+from utils.model_router import current_route
+
+# Canned values for every top-level key the agents ask for, so the full pipeline runs offline
+FAKE_SECTIONS = {
+    "skills_analysis": {
+        "technical_skills": ["Python", "SQL"],
+        "soft_skills": ["Communication"],
+        "tools_and_technologies": ["Docker", "Git"],
+    },
+    "experience_analysis": [
+        {"company": "Example Corp", "title": "Engineer", "dates": "2020 - Present", "responsibilities": ["Built services"]}
+    ],
+    "job_requirements": {
+        "required_skills": ["Python"],
+        "preferred_skills": ["AWS"],
+        "responsibilities": ["Build pipelines"],
+        "qualifications": ["BSc"],
+    },
+    "tailored_bullets": ["Built Python services used by the platform team"],
+    "fit_analysis": {
+        "overall_score": 75,
+        "skills_match": 80,
+        "experience_match": 70,
+        "missing_requirements": ["AWS"],
+        "strengths": ["Python"],
+        "areas_for_improvement": ["Cloud experience"],
+    },
+    "changes": [],
+    "overrides": {},
+    "cover_letter": "Dear Hiring Manager, ...",
+    "key_points": ["Python experience"],
+    "tone": "Professional and enthusiastic",
+    "length": "250",
+    "optimized_letter": "Dear Hiring Manager, ...",
+    "keywords_used": ["Python"],
+    "readability_score": "80",
+    "improvements_made": ["Added keywords"],
+    "refined_letter": "Dear Hiring Manager, ...",
+    "tone_analysis": {"formality_level": "Formal", "enthusiasm_level": "High", "confidence_level": "High"},
+    "style_improvements": ["Tightened opening"],
+    "enhanced_letter": "Dear Hiring Manager, ...",
+    "key_achievements": [{"achievement": "Built services", "impact": "Faster deploys", "relevance": "High"}],
+}
+
+class FakeLLM(LLM):
+    """Local stand-in for the chat model, for tests and offline runs.
+
+    Answers with canned JSON for every top-level key named in the prompt's
+    return format. Latency is log-normal around a median (latency_sigma=0
+    gives a fixed delay), with an optional slow tail and injected errors to
+    mimic a real provider. max_concurrency caps how many calls the fake
+    provider serves at once; calls over the cap wait for a slot, and those
+    waits are kept per router route for queue_waits(). Async calls stop and
+    give up their slot when cancelled, like a closed HTTP request, and are
+    counted in cancelled.
+    """
+    sections: Dict[str, Any] = FAKE_SECTIONS
+    latency: float = 0.0
+    latency_sigma: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    error_rate: float = 0.0
+    max_concurrency: int = 0
+    calls: int = 0
+    cancelled: int = 0
+    last_prompt: str = ""
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _slots: Any = PrivateAttr(default=None)
+    _waits: Any = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _respond(self, prompt: str) -> str:
+        """Build the JSON reply for a prompt from the canned sections."""
+        _, _, return_format = prompt.rpartition("Return format:")
+        keys = re.findall(r'"(\w+)"\s*:', return_format)
+        return json.dumps({key: self.sections[key] for key in keys if key in self.sections})
+
+    def sample_latency(self) -> float:
+        """Draw one response time from the configured distribution."""
+        if self.slow_rate and random.random() < self.slow_rate:
+            return self.slow_latency
+        if self.latency and self.latency_sigma:
+            return random.lognormvariate(math.log(self.latency), self.latency_sigma)
+        return self.latency
+
+    def queue_waits(self, route: Optional[str] = None) -> List[float]:
+        """Seconds each call (on one route, or on any) waited for a provider slot."""
+        with self._lock:
+            if route is not None:
+                return list(self._waits.get(route, ()))
+            return [wait for waits in self._waits.values() for wait in waits]
+
+    def queue_waits_by_route(self) -> Dict[str, List[float]]:
+        """Provider slot waits keyed by the router route that made the call ('' outside a router)."""
+        with self._lock:
+            return {route: list(waits) for route, waits in self._waits.items()}
+
+    def _begin(self, prompt: str):
+        """Count a call and return the provider's slots (None without a concurrency cap)."""
+        with self._lock:
+            self.calls += 1
+            self.last_prompt = prompt
+            if self.max_concurrency and self._slots is None:
+                self._slots = threading.BoundedSemaphore(self.max_concurrency)
+            return self._slots
+
+    def _record_wait(self, queued: float) -> None:
+        with self._lock:
+            waits = self._waits.setdefault(current_route.get(), deque(maxlen=100000))
+            waits.append(time.perf_counter() - queued)
+
+    def _reply(self, prompt: str) -> str:
+        """Answer a call that has been served, or fail it at error_rate."""
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Injected fake LLM error")
+        return self._respond(prompt)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        slots = self._begin(prompt)
+        queued = time.perf_counter()
+        if slots is not None:
+            slots.acquire()
+        try:
+            self._record_wait(queued)
+            delay = self.sample_latency()
+            if delay:
+                time.sleep(delay)
+            return self._reply(prompt)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        slots = self._begin(prompt)
+        queued = time.perf_counter()
+        acquired = False
+        try:
+            if slots is not None:
+                # Poll rather than block, so a cancel is noticed while queued too
+                while not slots.acquire(blocking=False):
+                    await asyncio.sleep(0.005)
+                acquired = True
+            self._record_wait(queued)
+            delay = self.sample_latency()
+            if delay:
+                await asyncio.sleep(delay)
+            return self._reply(prompt)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.cancelled += 1
+            raise
+        finally:
+            if acquired:
+                slots.release()
+
+class FakeLLMServer:
+    """Local HTTP stand-in for the OpenAI chat completions endpoint, backed by a FakeLLM.
+
+    Point ChatOpenAI at base_url to exercise the real client stack (HTTP,
+    connection pooling, retries) without calling the provider.
+    """
+    def __init__(self, llm: Optional[FakeLLM] = None, host: str = "127.0.0.1", port: int = 0):
+        """Initialize with the fake model that produces replies; port 0 picks a free port."""
+        self.llm = llm or FakeLLM()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        """Build the request handler class bound to this server's fake model."""
+        llm = self.llm
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+                try:
+                    status, payload = 200, {
+                        "id": f"chatcmpl-fake-{llm.calls}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": llm._call(prompt)},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 0, "total_tokens": len(prompt) // 4},
+                    }
+                except RuntimeError as e:
+                    status, payload = 500, {"error": {"message": str(e), "type": "server_error"}}
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        """Serve in a background thread and return the base URL."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Shut the server down."""
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,10 +1,66 @@
 import json
-from typing import Dict, Any
-import docx
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import PyPDF2
+import hashlib
+import os
+import time
+from typing import Dict, Any, Iterator, List, Optional
 import io
+import re
+
+# WordprocessingML namespaces used by the streaming DOCX extractor
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# File types picked up by bulk ingestion, mapped to their extractor
+INGEST_EXTENSIONS = {'.pdf': 'pdf', '.docx': 'docx'}
+
+# Part of every cache key; bump a version whenever that extractor's output changes
+# so text cached by the old extractor is not served (docx v2: streaming, with tables and
+# headers; v3: tab stop definitions no longer read as tabs)
+EXTRACTOR_VERSIONS = {'pdf': 1, 'docx': 3}
+
+def _cache_path(cache_dir: str, sha256: str, kind: str) -> str:
+    return os.path.join(cache_dir, f'{sha256}.{kind}-v{EXTRACTOR_VERSIONS[kind]}.txt')
+
+def _hash_file(path: str) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _manifest_entry(path: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+    return {'path': path, 'sha256': sha256, 'cached': False, 'duplicate_of': None,
+            'chars': 0, 'seconds': 0.0, 'error': None}
+
+def _ingest_file(path: str, digest: str, cache_dir: str) -> Dict[str, Any]:
+    """Extract one file for bulk ingestion, using the hash-keyed text cache."""
+    start = time.perf_counter()
+    entry = _manifest_entry(path, digest)
+    try:
+        kind = INGEST_EXTENSIONS[os.path.splitext(path)[1].lower()]
+        cache_path = _cache_path(cache_dir, digest, kind)
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            entry['cached'] = True
+        else:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if kind == 'pdf':
+                text = FileHandler._pdf_text(data)
+            else:
+                text = FileHandler._docx_text_stream(data)
+            # Write to a temp name first so a concurrent worker never reads a partial file
+            tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, cache_path)
+        entry['chars'] = len(text)
+    except Exception as e:
+        entry['error'] = f'{type(e).__name__}: {e}'
+    entry['seconds'] = round(time.perf_counter() - start, 4)
+    return entry
 
 class FileHandler:
     @staticmethod
@@ -29,6 +85,8 @@ class FileHandler:
     def create_word_document(content: Dict[str, Any], filename: str) -> None:
         """Create a Word document with the analysis results."""
         try:
+            import docx
+            from docx.enum.text import WD_ALIGN_PARAGRAPH
             doc = docx.Document()
             
             # Add title
@@ -64,17 +122,114 @@ class FileHandler:
         except Exception as e:
             print(f'Error creating Word document to {filename}:', e)
     
+    @staticmethod
+    def _pdf_text(pdf_file: bytes) -> str:
+        """Extract text from PDF bytes, raising on failure."""
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
+        return "".join(page.extract_text() for page in pdf_reader.pages)
+    
+    @staticmethod
+    def _docx_text(docx_file: bytes) -> str:
+        """Extract text from DOCX bytes, raising on failure."""
+        import docx
+        doc = docx.Document(io.BytesIO(docx_file))
+        return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
+    
+    @staticmethod
+    def _iter_docx_part_lines(xml_stream) -> Iterator[str]:
+        """Stream-parse one WordprocessingML part and yield its text lines.
+        
+        Paragraphs become lines, table rows become tab-separated lines, and
+        text boxes are read once (the VML fallback copy is skipped). Tabs and
+        breaks count only inside runs, so tab stop definitions in paragraph
+        properties (w:pPr/w:tabs/w:tab) are not mistaken for text. Finished
+        body elements are dropped as we go so memory does not grow with size.
+        """
+        import xml.etree.ElementTree as ET
+        paragraphs: List[List[str]] = []  # open paragraphs (text boxes nest them)
+        rows: List[List[str]] = []         # open table rows
+        cells: List[List[str]] = []        # open table cells
+        container = None
+        depth = 0
+        container_depth = -1
+        fallback_depth = 0
+        run_depth = 0
+        
+        for event, elem in ET.iterparse(xml_stream, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                depth += 1
+                if tag == MC_FALLBACK:
+                    fallback_depth += 1
+                elif fallback_depth:
+                    continue
+                elif tag in (W_NS + 'body', W_NS + 'hdr', W_NS + 'ftr'):
+                    container, container_depth = elem, depth
+                elif tag == W_NS + 'p':
+                    paragraphs.append([])
+                elif tag == W_NS + 'r':
+                    run_depth += 1
+                elif tag == W_NS + 'tr':
+                    rows.append([])
+                elif tag == W_NS + 'tc':
+                    cells.append([])
+                continue
+            
+            depth -= 1
+            if tag == MC_FALLBACK:
+                fallback_depth -= 1
+            elif fallback_depth:
+                pass
+            elif tag == W_NS + 'r':
+                run_depth -= 1
+            elif tag == W_NS + 't' and paragraphs:
+                paragraphs[-1].append(elem.text or '')
+            elif tag == W_NS + 'tab' and run_depth and paragraphs:
+                paragraphs[-1].append('\t')
+            elif tag in (W_NS + 'br', W_NS + 'cr') and run_depth and paragraphs:
+                paragraphs[-1].append('\n')
+            elif tag == W_NS + 'p':
+                # Text boxes close before their host paragraph, so they come out first
+                line = ''.join(paragraphs.pop())
+                if cells:
+                    cells[-1].append(line)
+                else:
+                    yield line
+            elif tag == W_NS + 'tc':
+                cell_text = ' '.join(t for t in cells.pop() if t)
+                if rows:
+                    rows[-1].append(cell_text)
+            elif tag == W_NS + 'tr':
+                row_text = '\t'.join(rows.pop())
+                if cells:
+                    cells[-1].append(row_text)  # nested table
+                else:
+                    yield row_text
+            
+            if container is not None and depth == container_depth:
+                # A top-level block is finished; release it and its siblings
+                container.clear()
+    
+    @staticmethod
+    def _docx_text_stream(docx_file: bytes) -> str:
+        """Extract DOCX text by streaming the XML parts, raising on failure."""
+        lines: List[str] = []
+        import zipfile
+        with zipfile.ZipFile(io.BytesIO(docx_file)) as archive:
+            names = archive.namelist()
+            headers = sorted(n for n in names if re.match(r'word/header\d*\.xml$', n))
+            footers = sorted(n for n in names if re.match(r'word/footer\d*\.xml$', n))
+            for name in headers + ['word/document.xml'] + footers:
+                with archive.open(name) as part:
+                    lines.extend(FileHandler._iter_docx_part_lines(part))
+        return ''.join(line + '\n' for line in lines)
+    
     @staticmethod
     def extract_text_from_pdf(pdf_file: bytes) -> str:
         """Extract text from a PDF file."""
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            
-            return text
+            return FileHandler._pdf_text(pdf_file)
         except Exception as e:
             print('Error extracting text from PDF:', e)
     
@@ -82,20 +237,104 @@ class FileHandler:
     def extract_text_from_docx(docx_file: bytes) -> str:
         """Extract text from a Word document."""
         try:
-            doc = docx.Document(io.BytesIO(docx_file))
-            text = ""
-            
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text
+            return FileHandler._docx_text(docx_file)
+        except Exception as e:
+            print('Error extracting text from DOCX:', e)
+    
+    @staticmethod
+    def extract_text_from_docx_fast(docx_file: bytes) -> str:
+        """Extract text from a Word document without building the python-docx object model.
+        
+        Unlike extract_text_from_docx, this includes tables, headers, footers
+        and text boxes.
+        """
+        try:
+            return FileHandler._docx_text_stream(docx_file)
         except Exception as e:
             print('Error extracting text from DOCX:', e)
     
+    @staticmethod
+    def load_cached_text(sha256: str, kind: str, cache_dir: str = '.extract_cache') -> Optional[str]:
+        """Return text extracted by the current extractor for a file hash and kind ('pdf' or 'docx'), or None."""
+        cache_path = _cache_path(cache_dir, sha256, kind)
+        if not os.path.exists(cache_path):
+            return None
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    @staticmethod
+    def ingest_directory(directory: str, cache_dir: str = '.extract_cache',
+                         max_workers: Optional[int] = None,
+                         manifest_file: Optional[str] = None) -> Dict[str, Any]:
+        """Extract text from every PDF and DOCX under a directory in parallel.
+        
+        Extracted text is cached in cache_dir keyed by the SHA-256 of the file
+        bytes and the extractor version, so re-uploads are served from disk.
+        Files are hashed first and identical ones are parsed only once per run.
+        Returns a manifest with per-file timing, cache hits, duplicates and errors.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        start = time.perf_counter()
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        paths: List[str] = []
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in INGEST_EXTENSIONS:
+                    paths.append(os.path.join(root, name))
+        
+        # Hash up front so each distinct file goes to a worker once
+        by_path: Dict[str, Dict[str, Any]] = {}
+        first_seen: Dict[str, str] = {}
+        duplicates: Dict[str, str] = {}
+        for path in paths:
+            try:
+                digest = _hash_file(path)
+            except OSError as e:
+                entry = _manifest_entry(path)
+                entry['error'] = f'{type(e).__name__}: {e}'
+                by_path[path] = entry
+                continue
+            key = digest + os.path.splitext(path)[1].lower()
+            if key in first_seen:
+                duplicates[path] = first_seen[key]
+            else:
+                first_seen[key] = path
+        
+        # Workers share the cache directory, so later runs and re-uploads skip parsing
+        unique = list(first_seen.values())
+        if unique:
+            digests = [key[:64] for key in first_seen]
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for entry in executor.map(_ingest_file, unique, digests, [cache_dir] * len(unique),
+                                          chunksize=max(1, len(unique) // 64)):
+                    by_path[entry['path']] = entry
+        for path, original in duplicates.items():
+            entry = dict(by_path[original], path=path, duplicate_of=original, seconds=0.0)
+            entry['cached'] = entry['error'] is None
+            by_path[path] = entry
+        entries = [by_path[path] for path in paths]
+        
+        manifest = {
+            'directory': directory,
+            'cache_dir': cache_dir,
+            'total_files': len(entries),
+            'cached_files': sum(1 for e in entries if e['cached']),
+            'duplicate_files': len(duplicates),
+            'failed_files': sum(1 for e in entries if e['error']),
+            'seconds': round(time.perf_counter() - start, 4),
+            'files': entries,
+        }
+        if manifest_file:
+            FileHandler.save_json(manifest, manifest_file)
+        return manifest
+    
     @staticmethod
     def create_cover_letter_doc(cover_letter: str, filename: str) -> None:
         """Create a Word document with the cover letter."""
         try:
+            import docx
+            from docx.enum.text import WD_ALIGN_PARAGRAPH
             doc = docx.Document()
             
             # Add title
@@ -118,6 +357,8 @@ class FileHandler:
     def create_tailored_resume_doc(resume_sections: Dict[str, Any], filename: str) -> None:
         """Create a Word document with the tailored resume."""
         try:
+            import docx
+            from docx.enum.text import WD_ALIGN_PARAGRAPH
             doc = docx.Document()
             
             # Add title
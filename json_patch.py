@@ -0,0 +1,83 @@
+import copy
+from typing import Any, Dict, List
+
+class JsonPatchError(ValueError):
+    """Raised when a patch operation cannot be applied."""
+
+def _parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def _list_index(container: list, token: str, allow_end: bool) -> int:
+    """Resolve a pointer token to a list index."""
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit():
+        raise JsonPatchError(f"Invalid list index: {token!r}")
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise JsonPatchError(f"List index out of range: {index}")
+    return index
+
+def _resolve_parent(doc: Any, tokens: List[str]):
+    """Walk to the container holding the last token of a pointer."""
+    target = doc
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise JsonPatchError(f"Path segment not found: {token!r}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_list_index(target, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Cannot descend into {type(target).__name__}")
+    return target
+
+def apply_patch(doc: Any, operations: List[Dict[str, Any]]) -> Any:
+    """Apply add/remove/replace operations (a subset of RFC 6902) and return a new document.
+
+    The input document is never modified; a failing operation raises
+    JsonPatchError and no partial result is returned.
+    """
+    result = copy.deepcopy(doc)
+    for op in operations:
+        if not isinstance(op, dict) or "op" not in op or "path" not in op:
+            raise JsonPatchError(f"Malformed operation: {op!r}")
+        kind = op["op"]
+        tokens = _parse_pointer(op["path"])
+        if not tokens:
+            if kind not in ("add", "replace"):
+                raise JsonPatchError("Cannot remove the document root")
+            result = copy.deepcopy(op.get("value"))
+            continue
+
+        parent = _resolve_parent(result, tokens)
+        last = tokens[-1]
+        if kind not in ("add", "remove", "replace"):
+            raise JsonPatchError(f"Unsupported operation: {kind!r}")
+        if kind != "remove" and "value" not in op:
+            raise JsonPatchError(f"Operation {kind!r} needs a value")
+
+        if isinstance(parent, dict):
+            if kind != "add" and last not in parent:
+                raise JsonPatchError(f"Key not found: {last!r}")
+            if kind == "remove":
+                del parent[last]
+            else:
+                parent[last] = copy.deepcopy(op["value"])
+        elif isinstance(parent, list):
+            index = _list_index(parent, last, allow_end=(kind == "add"))
+            if kind == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif kind == "remove":
+                del parent[index]
+            else:
+                parent[index] = copy.deepcopy(op["value"])
+        else:
+            raise JsonPatchError(f"Cannot apply {kind!r} inside {type(parent).__name__}")
+    return result
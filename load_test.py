@@ -0,0 +1,269 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from utils.fake_llm import FakeLLM, FakeLLMServer
+from utils.model_router import ModelRouter, DEFAULT_ROUTES, percentile
+from utils.resilience import Resilience
+from utils.stage_dag import StageGraph
+from agents.resume_agent import ResumeAgent, SECTION_ROUTES
+from agents.cover_letter_agent import CoverLetterAgent
+
+# Route of the model call each stage makes, to line provider queueing up with stage run times
+STAGE_ROUTES = dict(SECTION_ROUTES, combined_extraction="extract_combined", refined_analysis="refine_analysis",
+                    cover_letter="generate_cover_letter")
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Load recorded submissions: one JSON object per line with resume_text, job_description and optional 'at' offset in seconds."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def synthetic_trace(resumes: List[str], job_descriptions: List[str], count: int, rate: float,
+                    seed: int = 7) -> List[Dict[str, Any]]:
+    """Build Poisson arrivals at `rate` per second of random (resume, job description) pairs with small edits."""
+    rng = random.Random(seed)
+    trace, at = [], 0.0
+    for i in range(count):
+        at += rng.expovariate(rate)
+        trace.append({
+            "at": at,
+            # A unique suffix keeps each submission distinct, like real traffic
+            "resume_text": rng.choice(resumes) + f"\nReference {i}",
+            "job_description": rng.choice(job_descriptions),
+        })
+    return trace
+
+def schedule(trace: List[Dict[str, Any]], rate: Optional[float], seed: int = 7) -> List[Dict[str, Any]]:
+    """Give every submission an arrival offset: re-timed at `rate` if given, else as recorded."""
+    if rate is None and all("at" in item for item in trace):
+        return sorted(trace, key=lambda item: item["at"])
+    rng = random.Random(seed)
+    at = 0.0
+    timed = []
+    for item in trace:
+        at += rng.expovariate(rate or 1.0)
+        timed.append(dict(item, at=at))
+    return timed
+
+class InProcessTarget:
+    """Runs the same stage graph as the app (both agents) against a local model router."""
+    def __init__(self, router: ModelRouter, combined_extraction: bool = False, deadline: Optional[float] = None):
+        self.router = router
+        self.combined_extraction = combined_extraction
+        self.deadline = deadline
+
+    def submit(self, resume_text: str, job_description: str) -> Tuple[Dict[str, Dict[str, float]], bool, Dict[str, str]]:
+        """Run one submission and return per-stage run times, whether the result was partial and
+        the cause of each stage that degraded because its call failed."""
+        deadline_at = None if self.deadline is None else time.perf_counter() + self.deadline
+        graph = StageGraph()
+        resume_agent = ResumeAgent(self.router, combined_extraction=self.combined_extraction)
+        resume_agent.add_stages(graph, resume_text, job_description, deadline_at=deadline_at)
+        cover_letter_agent = CoverLetterAgent(self.router)
+        cover_letter_agent.add_stages(graph, resume_text, job_description)
+        graph.run(deadline_at)
+        _, completeness = resume_agent.collect_results(graph)
+        partial = graph.results.get("cover_letter") is None or any(s != "complete" for s in completeness.values())
+        # Each graph gives every ready stage its own thread, so stages wait at the provider, not here
+        stages = {
+            name: {"run": t["finished"] - t["started"]}
+            for name, t in graph.timings.items() if "finished" in t
+        }
+        return stages, partial, {**resume_agent.stage_errors, **cover_letter_agent.stage_errors}
+
+class HttpTarget:
+    """Posts submissions as JSON to an HTTP front end."""
+    def __init__(self, url: str, timeout: float = 300.0):
+        self.url = url
+        self.timeout = timeout
+
+    def submit(self, resume_text: str, job_description: str) -> Tuple[Dict[str, Dict[str, float]], bool, Dict[str, str]]:
+        """Send one submission; per-stage times, completeness and stage errors are not visible from outside."""
+        data = json.dumps({"resume_text": resume_text, "job_description": job_description}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+        return {}, False, {}
+
+def replay(target, trace: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Replay timed submissions against a target with at most `concurrency` in flight; return raw samples."""
+    samples = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def run(item: Dict[str, Any]) -> None:
+        began = time.perf_counter()
+        sample = {"queue_delay": began - (start + item["at"]), "error": None, "stages": {}, "partial": False}
+        try:
+            sample["stages"], sample["partial"], stage_errors = target.submit(item["resume_text"], item["job_description"])
+            # A response degraded by failed calls is served, but counts as an error
+            if stage_errors:
+                sample["error"] = "degraded: " + ", ".join(f"{name} ({cause})" for name, cause in sorted(stage_errors.items()))
+        except Exception as e:
+            sample["error"] = f"{type(e).__name__}: {e}"
+        sample["latency"] = time.perf_counter() - began
+        sample["end_to_end"] = time.perf_counter() - (start + item["at"])
+        with lock:
+            samples.append(sample)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for item in trace:
+            delay = start + item["at"] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run, item)
+    return {"samples": samples, "wall_seconds": time.perf_counter() - start}
+
+def _stats(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+    }
+
+def summarize(result: Dict[str, Any], queue_waits: Optional[Dict[str, List[float]]] = None) -> Dict[str, Any]:
+    """Latency percentiles, throughput, error rate and per-stage run and provider queue times.
+
+    queue_waits maps each route to the seconds its calls waited for a provider slot.
+    """
+    queue_waits = queue_waits or {}
+    samples = result["samples"]
+    ok = [s for s in samples if not s["error"]]
+    stage_names = sorted({name for s in ok for name in s["stages"]})
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0,
+        "partial": sum(1 for s in ok if s["partial"]),
+        "throughput_per_second": round(len(ok) / result["wall_seconds"], 3) if result["wall_seconds"] else 0.0,
+        "service_latency": _stats([s["latency"] for s in ok]),
+        "end_to_end_latency": _stats([s["end_to_end"] for s in ok]),
+        "admission_queue_delay": _stats([max(0.0, s["queue_delay"]) for s in samples]),
+        "stages": {
+            name: {
+                "run": _stats([s["stages"][name]["run"] for s in ok if name in s["stages"]]),
+                "queue": _stats(queue_waits.get(STAGE_ROUTES.get(name, ""), [])),
+            }
+            for name in stage_names
+        },
+        "provider_queue_wait": _stats([wait for waits in queue_waits.values() for wait in waits]),
+        "error_samples": sorted({s["error"] for s in samples if s["error"]})[:5],
+    }
+
+def print_report(summary: Dict[str, Any]) -> None:
+    """Print the summary as a readable table."""
+    print(f"requests {summary['requests']}  errors {summary['errors']} ({summary['error_rate']:.2%})  "
+          f"partial {summary['partial']}  throughput {summary['throughput_per_second']}/s")
+    for label in ("service_latency", "end_to_end_latency", "admission_queue_delay", "provider_queue_wait"):
+        stats = summary.get(label)
+        if stats:
+            print(f"{label:24} p50 {stats['p50']:7.3f}s  p95 {stats['p95']:7.3f}s  p99 {stats['p99']:7.3f}s  max {stats['max']:7.3f}s")
+    if summary["stages"]:
+        print(f"\n{'stage':24} {'run p50':>8} {'run p95':>8} {'run p99':>8} {'queue p50':>10} {'queue p95':>10}")
+        for name, stats in summary["stages"].items():
+            queue = stats["queue"] or {"p50": 0.0, "p95": 0.0}
+            print(f"{name:24} {stats['run']['p50']:8.3f} {stats['run']['p95']:8.3f} {stats['run']['p99']:8.3f} "
+                  f"{queue['p50']:10.3f} {queue['p95']:10.3f}")
+    for error in summary["error_samples"]:
+        print("error:", error)
+    if summary.get("resilience"):
+        print("\nresilience:", json.dumps(summary["resilience"], indent=2))
+
+def build_router(args, llm: FakeLLM, server: Optional[FakeLLMServer],
+                 resilience: Optional[Resilience]) -> ModelRouter:
+    """Router whose models are the in-process fake, or real OpenAI clients pointed at the fake server."""
+    if server is None:
+        return ModelRouter.single(llm, resilience)
+
+    def factory(config: Dict[str, Any]):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=config.get("model", "fake"), temperature=config.get("temperature", 0.0),
+                          base_url=server.base_url, api_key="fake", max_retries=0, timeout=args.timeout)
+
+    return ModelRouter(DEFAULT_ROUTES, {"model": "fake", "temperature": 0.7}, factory, resilience)
+
+def server_llm(args) -> FakeLLM:
+    """Fake model with the latency distribution, error rate and provider concurrency from the command line."""
+    return FakeLLM(latency=args.median_latency, latency_sigma=args.latency_sigma,
+                   slow_rate=args.slow_rate, slow_latency=args.slow_latency, error_rate=args.error_rate,
+                   max_concurrency=args.provider_concurrency)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay resume/job submissions against the analysis pipeline.")
+    parser.add_argument("--trace", help="JSONL trace of submissions (default: synthetic from the sample files)")
+    parser.add_argument("--requests", type=int, default=100, help="synthetic submissions to generate")
+    parser.add_argument("--rate", type=float, help="arrival rate per second (default: trace timing, or 1/s)")
+    parser.add_argument("--concurrency", type=int, default=50, help="maximum submissions in flight")
+    parser.add_argument("--mode", choices=["in-process", "http-llm", "http-frontend"], default="in-process",
+                        help="in-process fake model, real OpenAI client against the local fake server, or an HTTP front end")
+    parser.add_argument("--url", help="front end URL for --mode http-frontend")
+    parser.add_argument("--median-latency", type=float, default=1.5, help="fake LLM median latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal sigma of fake LLM latency")
+    parser.add_argument("--slow-rate", type=float, default=0.01, help="fraction of fake LLM calls in the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=20.0, help="latency of slow-tail calls in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake LLM calls that fail")
+    parser.add_argument("--provider-concurrency", type=int, default=0,
+                        help="calls the fake provider serves at once; the rest queue for a slot (0: unlimited)")
+    parser.add_argument("--deadline", type=float, help="per-submission response deadline in seconds")
+    parser.add_argument("--timeout", type=float, help="per-call timeout in seconds (enables the resilience policy)")
+    parser.add_argument("--hedge-percentile", type=float,
+                        help="send a duplicate request once a call is slower than this latency percentile")
+    parser.add_argument("--breaker-failures", type=int,
+                        help="consecutive failures that open the circuit breaker (enables the resilience policy)")
+    parser.add_argument("--combined-extraction", action="store_true", help="use the combined extraction call")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        trace = schedule(load_trace(args.trace), args.rate)
+    else:
+        with open("sampleresume.txt", encoding="utf-8") as f:
+            resumes = [f.read()]
+        with open("sample2.txt", encoding="utf-8") as f:
+            resumes.append(f.read())
+        with open("jobdes.txt", encoding="utf-8") as f:
+            job_descriptions = [f.read()]
+        trace = synthetic_trace(resumes, job_descriptions, args.requests, args.rate or 1.0)
+
+    server = None
+    llm = None
+    resilience = None
+    if args.timeout is not None or args.hedge_percentile is not None or args.breaker_failures is not None:
+        resilience = Resilience(timeout=args.timeout, hedge_percentile=args.hedge_percentile,
+                                failure_threshold=args.breaker_failures or 5)
+    if args.mode == "http-frontend":
+        if not args.url:
+            parser.error("--url is required for --mode http-frontend")
+        target = HttpTarget(args.url)
+    else:
+        llm = server_llm(args)
+        if args.mode == "http-llm":
+            server = FakeLLMServer(llm)
+            server.start()
+        target = InProcessTarget(build_router(args, llm, server, resilience), args.combined_extraction, args.deadline)
+
+    try:
+        result = replay(target, trace, args.concurrency)
+    finally:
+        if server is not None:
+            server.stop()
+    summary = summarize(result, llm.queue_waits_by_route() if llm is not None else None)
+    if resilience is not None:
+        summary["resilience"] = resilience.summary()
+
+    print_report(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
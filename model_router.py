@@ -0,0 +1,144 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from utils.stage_dag import StageCancelled
+
+# Extractive stages run on a small model with no sampling; generative stages
+# inherit the router's default (large) model and only set their temperature
+DEFAULT_ROUTES = {
+    "extract_skills": {"model": "gpt-4o-mini", "temperature": 0.0},
+    "extract_experience": {"model": "gpt-4o-mini", "temperature": 0.0},
+    "extract_combined": {"model": "gpt-4o-mini", "temperature": 0.0},
+    "analyze_job_requirements": {"model": "gpt-4o-mini", "temperature": 0.0},
+    "calculate_fit_score": {"model": "gpt-4o-mini", "temperature": 0.0},
+    "generate_tailored_bullets": {"temperature": 0.7},
+    "refine_analysis": {"temperature": 0.3},
+    "generate_cover_letter": {"temperature": 0.7},
+    "optimize_cover_letter": {"temperature": 0.3},
+    "refine_tone": {"temperature": 0.7},
+    "enhance_impact": {"temperature": 0.7},
+}
+
+# Route of the call in progress, for backends that break their own figures down by stage
+current_route: ContextVar[str] = ContextVar("current_route", default="")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+class ModelRouter:
+    """Maps each agent tool name to a model configuration and records per-route latency."""
+    def __init__(self, routes: Optional[Dict[str, Dict[str, Any]]] = None,
+                 default: Optional[Dict[str, Any]] = None,
+                 llm_factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 resilience=None):
+        """Initialize with route configs, a default config and a factory that builds an LLM from a config.
+
+        Routes not listed fall back to default. Tests can pass a factory that
+        returns local fake models instead of API clients. An optional
+        resilience.Resilience adds timeouts, hedging and circuit breaking to
+        every call made through invoke().
+        """
+        self.routes = dict(routes or {})
+        self.default = dict(default or {})
+        self.llm_factory = llm_factory
+        self.resilience = resilience
+        self._llms: Dict[tuple, Any] = {}
+        self._latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def single(cls, llm, resilience=None) -> "ModelRouter":
+        """Build a router that sends every route to the same language model."""
+        return cls(llm_factory=lambda config: llm, resilience=resilience)
+
+    def config_for(self, route: str) -> Dict[str, Any]:
+        """Return the model configuration for a route."""
+        config = dict(self.default)
+        config.update(self.routes.get(route, {}))
+        return config
+
+    def get(self, route: str):
+        """Return the language model for a route, building each distinct config once."""
+        config = self.config_for(route)
+        key = tuple(sorted(config.items()))
+        with self._lock:
+            if key not in self._llms:
+                self._llms[key] = self.llm_factory(config)
+            return self._llms[key]
+
+    def record(self, route: str, seconds: float) -> None:
+        """Record the latency of one call on a route."""
+        with self._lock:
+            self._latencies.setdefault(route, []).append(seconds)
+
+    @contextmanager
+    def timed(self, route: str):
+        """Context manager that records how long the enclosed call took and sets current_route during it."""
+        token = current_route.set(route)
+        start = time.perf_counter()
+        cancelled = False
+        try:
+            yield
+        except StageCancelled:
+            # A call cut off part-way says nothing about how long the route takes
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                self.record(route, time.perf_counter() - start)
+            current_route.reset(token)
+
+    def invoke(self, route: str, func: Callable[[Optional[threading.Event]], Any],
+               cancel_event: Optional[threading.Event] = None) -> Any:
+        """Make one model call on a route, timed, and guarded by the resilience policy if there is one.
+
+        func makes the call and should stop early once the event it is given
+        is set: cancel_event, or with a resilience policy an event of the
+        attempt's own that is also set when it loses a hedge or times out.
+        """
+        if self.resilience is not None:
+            return self.resilience.call(self, route, func, cancel_event)
+        with self.timed(route):
+            return func(cancel_event)
+
+    def estimate(self, route: str, pct: float = 95.0, min_calls: int = 5) -> Optional[float]:
+        """Recorded latency percentile for a route, or None until it has enough calls to go on."""
+        with self._lock:
+            values = list(self._latencies.get(route, []))
+        if len(values) < min_calls:
+            return None
+        return percentile(values, pct)
+
+    def fits(self, route: str, deadline_at: Optional[float], pct: float = 95.0) -> bool:
+        """Whether a call on a route is expected to finish before deadline_at (a time.perf_counter() value).
+
+        Routes without enough recorded calls are assumed to fit; the deadline
+        itself still bounds them.
+        """
+        if deadline_at is None:
+            return True
+        return time.perf_counter() + (self.estimate(route, pct) or 0.0) <= deadline_at
+
+    def latency_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize recorded latency per route, for tuning the route mapping."""
+        with self._lock:
+            latencies = {route: list(values) for route, values in self._latencies.items()}
+        return {
+            route: {
+                "model": self.config_for(route).get("model", ""),
+                "calls": len(values),
+                "mean": round(sum(values) / len(values), 4),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "max": round(max(values), 4),
+            }
+            for route, values in latencies.items() if values
+        }
@@ -0,0 +1,196 @@
+import hashlib
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Signature values are the top 32 bits of each shingle hash; this marks an empty slot
+_EMPTY = (1 << 32) - 1
+
+def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick bands x rows = num_perm whose LSH threshold (1/b)^(1/r) is closest to the target."""
+    best = (num_perm, 1)
+    best_gap = float('inf')
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        gap = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+class NearDuplicateIndex:
+    """MinHash signatures in a banded LSH index for finding near-duplicate documents.
+
+    Signatures are stored in one flat array of 32-bit values and each band
+    bucket holds a single int until it collides, so a few hundred thousand
+    documents fit comfortably in memory.
+    """
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, seed: int = 1):
+        """Initialize an empty index for the given Jaccard similarity threshold."""
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        self._hash_key = seed.to_bytes(8, 'little')
+        self._signatures = array('I')
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._buckets: List[Dict[int, Any]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def signature(self, shingles: Iterable[str]) -> array:
+        """Compute the MinHash signature of a set of shingles.
+        
+        Uses one-permutation hashing: each shingle is hashed once and the low
+        bits pick the slot it competes for, so cost is linear in the number
+        of shingles rather than shingles x num_perm. Empty slots take the
+        value of the next filled slot (rotation densification) so every slot
+        stays comparable between documents.
+        """
+        slots = [_EMPTY] * self.num_perm
+        for shingle in set(shingles):
+            digest = hashlib.blake2b(shingle.encode('utf-8'), digest_size=8, key=self._hash_key).digest()
+            h = int.from_bytes(digest, 'little')
+            slot = h % self.num_perm
+            value = h >> 32
+            if value < slots[slot]:
+                slots[slot] = value
+        
+        if _EMPTY in slots and any(value != _EMPTY for value in slots):
+            dense = list(slots)
+            for i in range(self.num_perm):
+                j = i
+                while slots[j] == _EMPTY:
+                    j = (j + 1) % self.num_perm
+                dense[i] = slots[j]
+            slots = dense
+        return array('I', slots)
+    
+    def _band_keys(self, signature: array) -> List[int]:
+        """Hash each band of a signature to a bucket key."""
+        return [
+            hash(tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _stored(self, position: int) -> array:
+        return self._signatures[position * self.num_perm:(position + 1) * self.num_perm]
+
+    def add(self, key: str, shingles: Iterable[str]) -> None:
+        """Index a document's shingles under a key; re-adding a key is ignored."""
+        signature = self.signature(shingles)
+        with self._lock:
+            if key in self._positions:
+                return
+            position = len(self._keys)
+            self._keys.append(key)
+            self._positions[key] = position
+            self._signatures.extend(signature)
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                existing = bucket.get(band_key)
+                if existing is None:
+                    bucket[band_key] = position
+                elif isinstance(existing, list):
+                    existing.append(position)
+                else:
+                    bucket[band_key] = [existing, position]
+
+    def query(self, shingles: Iterable[str]) -> List[Tuple[str, float]]:
+        """Return (key, estimated Jaccard similarity) for indexed documents at or above the threshold."""
+        signature = self.signature(shingles)
+        with self._lock:
+            candidates = set()
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                found = bucket.get(band_key)
+                if found is None:
+                    continue
+                if isinstance(found, list):
+                    candidates.update(found)
+                else:
+                    candidates.add(found)
+            matches = []
+            for position in candidates:
+                stored = self._stored(position)
+                similarity = sum(1 for x, y in zip(signature, stored) if x == y) / self.num_perm
+                if similarity >= self.threshold:
+                    matches.append((self._keys[position], similarity))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+class NearDuplicateCache:
+    """Reuses stored results (job profiles, analyses) for near-duplicate documents.
+
+    A document is one or more text fields, such as a resume and a job
+    description. Each field position has its own index and a result is only
+    reused when every field clears the threshold, so a long resume cannot
+    carry a different job description past it. Shingles are the keywords
+    from TextProcessor.extract_keywords. Hits carry an audit record naming
+    the document they were reused from and the estimated similarity of each
+    field, so reuse is never silent.
+    """
+    def __init__(self, text_processor, threshold: float = 0.9, num_perm: int = 64):
+        """Initialize with a TextProcessor and the similarity each field needs to reuse a result."""
+        self.text_processor = text_processor
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.indexes: List[NearDuplicateIndex] = []
+        self._payloads: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _indexes_for(self, count: int) -> List[NearDuplicateIndex]:
+        """Return the indexes of the first `count` field positions, creating them on first use."""
+        with self._lock:
+            while len(self.indexes) < count:
+                self.indexes.append(NearDuplicateIndex(threshold=self.threshold, num_perm=self.num_perm))
+            return self.indexes[:count]
+
+    def shingles(self, text: str) -> List[str]:
+        """Keyword shingles for one text field."""
+        return list(self.text_processor.extract_keywords(text))
+
+    @staticmethod
+    def document_key(*texts: str) -> str:
+        """Exact content key for one or more texts."""
+        return hashlib.sha256("\x00".join(texts).encode('utf-8')).hexdigest()
+
+    def lookup(self, *texts: str) -> Optional[Dict[str, Any]]:
+        """Return the stored payload whose every field is a near-duplicate of the texts, with an audit record.
+
+        Of several such documents, the one whose least similar field is the
+        most similar wins; "similarity" in the audit is that lowest field.
+        """
+        matches = [
+            dict(index.query(self.shingles(text)))
+            for index, text in zip(self._indexes_for(len(texts)), texts)
+        ]
+        with self._lock:
+            candidates = [
+                key for key in set(matches[0]).intersection(*matches[1:])
+                if self._payloads.get(key, (None,))[0] == len(texts)
+            ] if matches else []
+            if not candidates:
+                return None
+            key = max(candidates, key=lambda k: (min(m[k] for m in matches), k))
+            payload = self._payloads[key][1]
+        field_similarity = [round(m[key], 3) for m in matches]
+        return {
+            "payload": payload,
+            "audit": {
+                "near_duplicate": True,
+                "reused_from": key,
+                "similarity": min(field_similarity),
+                "field_similarity": field_similarity,
+                "exact": key == self.document_key(*texts),
+            },
+        }
+
+    def store(self, payload: Any, *texts: str) -> str:
+        """Index each text field and keep the payload to reuse for near-duplicates."""
+        key = self.document_key(*texts)
+        with self._lock:
+            self._payloads[key] = (len(texts), payload)
+        for index, text in zip(self._indexes_for(len(texts)), texts):
+            index.add(key, self.shingles(text))
+        return key
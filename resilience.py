@@ -0,0 +1,223 @@
+import sys
+import threading
+import time
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+from utils.stage_dag import LinkedEvent, StageCancelled
+
+class StageTimeout(TimeoutError):
+    """Raised when a model call on a route takes longer than its timeout."""
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the model while the backend's circuit breaker is open."""
+
+# What each kind of transient failure is reported as
+FAILURE_CAUSES = {"timeout": "timed out", "circuit_open": "model service unavailable", "provider_error": "model service error"}
+
+def transient_cause(error: BaseException) -> Optional[str]:
+    """Key in FAILURE_CAUSES for a failure a stage should degrade on, or None if it should propagate.
+
+    Timeouts, an open circuit and the provider's connection, rate limit and
+    server errors are transient. Anything else (bad credentials, invalid
+    requests, bugs) is not, so it fails the run instead of hiding as a
+    shortened result.
+    """
+    if isinstance(error, StageTimeout):
+        return "timeout"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    # Only a client that is already in use can have raised its errors
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(
+            error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return "timeout" if isinstance(error, openai.APITimeoutError) else "provider_error"
+    return None
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single trial call through after reset_seconds.
+
+    A successful trial closes the breaker again; a failed one re-opens it.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        """Initialize a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if self._trial else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self._trial and time.perf_counter() - self.opened_at >= self.reset_seconds:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> bool:
+        """Record a failed call; return True if it opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self._trial = False
+                self.opened_at = time.perf_counter()
+                self.trips += 1
+                return True
+            return False
+
+class Resilience:
+    """Timeouts, hedged requests and circuit breaking for model calls made through a ModelRouter.
+
+    A call that has not answered after the route's hedge_percentile latency
+    gets one duplicate request; whichever answers first wins and the other
+    is cancelled. Each attempt runs on its own thread with its own cancel
+    event (also set when the run is cancelled), which is set when the
+    attempt loses, times out or is abandoned, so it can stop instead of
+    holding a provider slot; the timeout counts only time spent on the call.
+    Each backend (model name) has its own circuit breaker. Until a route has
+    enough recorded calls there is nothing to hedge on, so it is not hedged.
+    """
+    def __init__(self, timeout: Optional[float] = 60.0, stage_timeouts: Optional[Dict[str, float]] = None,
+                 hedge_percentile: Optional[float] = 95.0, failure_threshold: int = 5,
+                 reset_seconds: float = 30.0):
+        """Initialize with a default timeout in seconds, per-route overrides and breaker settings.
+
+        A timeout or hedge_percentile of None disables that feature.
+        """
+        self.timeout = timeout
+        self.stage_timeouts = dict(stage_timeouts or {})
+        self.hedge_percentile = hedge_percentile
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def breaker_for(self, backend: str) -> CircuitBreaker:
+        """Return the circuit breaker for a backend, creating it on first use."""
+        with self._lock:
+            if backend not in self.breakers:
+                self.breakers[backend] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return self.breakers[backend]
+
+    def _count(self, route: str, event: str) -> None:
+        with self._lock:
+            route_counts = self.counts.setdefault(route, {})
+            route_counts[event] = route_counts.get(event, 0) + 1
+
+    @staticmethod
+    def _start(attempt: Callable[[], Any]) -> Future:
+        """Run one attempt on a new daemon thread; the call has started when this returns."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                future.set_result(attempt())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="llm-call", daemon=True).start()
+        return future
+
+    def call(self, router, route: str, func: Callable[[LinkedEvent], Any],
+             cancel_event: Optional[threading.Event] = None) -> Any:
+        """Make one model call on a route with its timeout, hedging and circuit breaker.
+
+        func is called with each attempt's cancel event, which is linked to cancel_event.
+        """
+        breaker = self.breaker_for(router.config_for(route).get("model", route))
+        if not breaker.allow():
+            self._count(route, "short_circuited")
+            raise CircuitOpenError(f"Circuit open for route '{route}'")
+
+        timeout = self.stage_timeouts.get(route, self.timeout)
+        hedge_after = None if self.hedge_percentile is None else router.estimate(route, self.hedge_percentile)
+        # Each running attempt maps to whether it is the hedge, and its own cancel event
+        attempts: Dict[Future, Tuple[bool, LinkedEvent]] = {}
+
+        def start_attempt(is_hedge: bool) -> None:
+            cancel = LinkedEvent(cancel_event)
+
+            def attempt():
+                with router.timed(route):
+                    return func(cancel)
+
+            attempts[self._start(attempt)] = (is_hedge, cancel)
+
+        start_attempt(False)
+        start = time.perf_counter()
+        hedged = False
+        error = None
+        try:
+            while attempts:
+                elapsed = time.perf_counter() - start
+                waits = []
+                if timeout is not None:
+                    waits.append(timeout - elapsed)
+                if hedge_after is not None and not hedged:
+                    waits.append(hedge_after - elapsed)
+                done, _ = wait(attempts, timeout=max(0.0, min(waits)) if waits else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    is_hedge, _ = attempts.pop(future)
+                    # A cancelled run says nothing about the backend's health
+                    if isinstance(future.exception(), StageCancelled):
+                        raise future.exception()
+                    if future.exception() is None:
+                        breaker.record_success()
+                        if is_hedge:
+                            self._count(route, "hedge_wins")
+                        return future.result()
+                    # A failed attempt only counts if no other attempt is still in flight
+                    error = future.exception()
+                if not attempts:
+                    break
+
+                elapsed = time.perf_counter() - start
+                if timeout is not None and elapsed >= timeout:
+                    self._count(route, "timeouts")
+                    error = StageTimeout(f"Route '{route}' did not answer within {timeout:.1f}s")
+                    break
+                if hedge_after is not None and not hedged and elapsed >= hedge_after:
+                    hedged = True
+                    self._count(route, "hedges")
+                    start_attempt(True)
+        finally:
+            # Stop whatever is still running: the losing hedge, or attempts that timed out
+            for _, cancel in attempts.values():
+                cancel.set()
+
+        if breaker.record_failure():
+            self._count(route, "breaker_trips")
+        raise error
+
+    def summary(self) -> Dict[str, Any]:
+        """Hedge, timeout and breaker counts per route, and the state of each backend's breaker."""
+        with self._lock:
+            counts = {route: dict(events) for route, events in self.counts.items()}
+            breakers = dict(self.breakers)
+        return {
+            "routes": counts,
+            "breakers": {
+                backend: {"state": breaker.state, "trips": breaker.trips}
+                for backend, breaker in breakers.items()
+            },
+        }
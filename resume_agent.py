@@ -1,10 +1,19 @@
-from langchain.tools import Tool
-from langchain.prompts import ChatPromptTemplate
-from langchain.chains import LLMChain
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import re
+import threading
+import time
 import json
 import json5
+from utils.model_router import ModelRouter
+from utils.resilience import transient_cause
+from utils.stage_dag import StageGraph, StageCancelled, run_cancellable
+from utils.json_patch import apply_patch, JsonPatchError
+from utils.resume_sections import parse_resume, render_sections, experience_is_complete
+
+def _prompt(template: str):
+    """Build a chat prompt template, importing LangChain on first use."""
+    from langchain.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(template)
 
 # Helper to clean LLM output
 def extract_json_with_key(text, required_key):
@@ -31,15 +40,128 @@ def extract_json_with_key(text, required_key):
     print(f"DEBUG: No JSON object with key '{required_key}' found!")
     return {}
 
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+# Shape checks for each analysis section, used to decide which keys need a retry
+SECTION_VALIDATORS = {
+    "skills_analysis": lambda v: isinstance(v, dict) and all(
+        _is_str_list(v.get(k)) for k in ("technical_skills", "soft_skills", "tools_and_technologies")
+    ),
+    "experience_analysis": lambda v: isinstance(v, list) and all(
+        isinstance(e, dict) and "title" in e and "company" in e and isinstance(e.get("responsibilities", []), list)
+        for e in v
+    ),
+    "job_requirements": lambda v: isinstance(v, dict) and all(
+        _is_str_list(v.get(k)) for k in ("required_skills", "preferred_skills", "responsibilities", "qualifications")
+    ),
+    "tailored_bullets": lambda v: _is_str_list(v) and len(v) > 0,
+    "fit_analysis": lambda v: isinstance(v, dict) and "overall_score" in v and _is_str_list(v.get("strengths", [])),
+}
+
+def validate_section(key: str, value) -> bool:
+    """Check that an analysis section has the expected structure."""
+    validator = SECTION_VALIDATORS.get(key)
+    return bool(validator and validator(value))
+
+# Return-format snippets for the combined extraction prompt (braces escaped for ChatPromptTemplate)
+SECTION_FORMATS = {
+    "skills_analysis": '"skills_analysis": {{\n        "technical_skills": [],\n        "soft_skills": [],\n        "tools_and_technologies": []\n    }}',
+    "experience_analysis": '"experience_analysis": [\n        {{\n            "company": "",\n            "title": "",\n            "dates": "",\n            "responsibilities": []\n        }}\n    ]',
+    "tailored_bullets": '"tailored_bullets": ["Bullet point 1", "Bullet point 2"]',
+    "fit_analysis": '"fit_analysis": {{\n        "overall_score": 0-100,\n        "skills_match": 0-100,\n        "experience_match": 0-100,\n        "missing_requirements": [],\n        "strengths": [],\n        "areas_for_improvement": []\n    }}',
+}
+
+# Sections produced by the initial analysis, in display order
+ANALYSIS_KEYS = ("skills_analysis", "experience_analysis", "job_requirements", "tailored_bullets", "fit_analysis")
+
+# Route of the per-stage prompt behind each section
+SECTION_ROUTES = {
+    "skills_analysis": "extract_skills",
+    "experience_analysis": "extract_experience",
+    "job_requirements": "analyze_job_requirements",
+    "tailored_bullets": "generate_tailored_bullets",
+    "fit_analysis": "calculate_fit_score",
+}
+
+def _empty_section(key: str):
+    return [] if key in ("experience_analysis", "tailored_bullets") else {}
+
+def _local_section(key: str, sections: Dict):
+    """Cheap stand-in for a section built from the local resume parse, or None if there is none."""
+    if key == "skills_analysis" and sections.get("skills"):
+        return {"technical_skills": list(sections["skills"]), "soft_skills": [], "tools_and_technologies": []}
+    if key == "experience_analysis" and sections.get("experience"):
+        return sections["experience"]
+    return None
+
+# Keys the combined call can return, and whether each needs the job description
+COMBINABLE_KEYS = {
+    "skills_analysis": False,
+    "experience_analysis": False,
+    "tailored_bullets": True,
+    "fit_analysis": True,
+}
+
 class ResumeAgent:
     """Agent for analyzing and tailoring resumes using an LLM."""
-    def __init__(self, llm):
-        """Initialize with a language model."""
-        self.llm = llm
-        self.tools = self._create_tools()
+    def __init__(self, router, combined_extraction: bool = False,
+                 combined_keys: tuple = ("skills_analysis", "experience_analysis")):
+        """Initialize with a ModelRouter (or a single language model used for every stage).
         
-    def _create_tools(self) -> List[Tool]:
+        With combined_extraction, the sections in combined_keys are requested in
+        a single structured call; any key that comes back invalid is retried
+        with its own per-stage prompt. Only sections whose own route uses the
+        same model config as 'extract_combined' are combined, so a generative
+        section never moves off the model configured for it.
+        """
+        self.router = router if isinstance(router, ModelRouter) else ModelRouter.single(router)
+        self.combined_extraction = combined_extraction
+        combined_config = self.router.config_for('extract_combined')
+        self.combined_keys = tuple(
+            k for k in combined_keys
+            if k in COMBINABLE_KEYS and self.router.config_for(SECTION_ROUTES[k]) == combined_config
+        )
+        if combined_extraction and len(self.combined_keys) < len(combined_keys):
+            print("DEBUG: Not combining sections routed to another model:",
+                  [k for k in combined_keys if k not in self.combined_keys])
+        self.llm_calls = 0
+        self.last_run_stats = {}
+        self.cancel_event = None
+        self.deadline_at = None
+        self._fallback_keys = []
+        self._section_status = {}
+        self.stage_errors: Dict[str, str] = {}
+        self._calls_lock = threading.Lock()
+        self._tools = None
+    
+    def _run_chain(self, route: str, prompt, **inputs) -> str:
+        """Run a prompt on the model routed for this stage, counting and timing the call.
+        
+        Cancelling the run, or the resilience policy giving up on an attempt,
+        abandons the call in flight; the client timeout still bounds how long
+        the provider keeps working on it.
+        """
+        # Don't spend quota on a run the user has already abandoned
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise StageCancelled(route)
+        with self._calls_lock:
+            self.llm_calls += 1
+        from langchain.chains import LLMChain
+        chain = LLMChain(llm=self.router.get(route), prompt=prompt)
+        return self.router.invoke(route, lambda cancel: run_cancellable(lambda: chain.arun(**inputs), cancel),
+                                  self.cancel_event)
+        
+    @property
+    def tools(self) -> list:
+        """LangChain tools for this agent, built on first access."""
+        if self._tools is None:
+            self._tools = self._create_tools()
+        return self._tools
+    
+    def _create_tools(self) -> list:
         """Create specialized tools for resume analysis and tailoring."""
+        from langchain.tools import Tool
         return [
             Tool(
                 name="extract_skills",
@@ -73,85 +195,356 @@ class ResumeAgent:
             )
         ]
     
-    def _extract_skills(self, resume_text: str) -> Dict:
-        """Extract skills from resume text."""
-        prompt = ChatPromptTemplate.from_template(
+    def _extract_skills(self, resume_text: str, known_skills: List[str] = None) -> Dict:
+        """Extract skills from resume text.
+        
+        With known_skills (parsed locally from the skills section), only the
+        summary is sent and the model just sorts the listed skills; any it
+        drops are put back into technical_skills.
+        """
+        if known_skills:
+            return self._classify_known_skills(resume_text, known_skills)
+        prompt = _prompt(
             """Extract all technical and soft skills from the following resume text.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in a 'skills_analysis' key as shown below.\n\nResume text:\n{resume_text}\n\nReturn format:\n{{\n    \"skills_analysis\": {{\n        \"technical_skills\": [],\n        \"soft_skills\": [],\n        \"tools_and_technologies\": []\n    }}\n}}\n"""
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(resume_text=resume_text)
+        result = self._run_chain('extract_skills', prompt, resume_text=resume_text)
         return extract_json_with_key(result, 'skills_analysis')
     
+    def _classify_known_skills(self, summary: str, known_skills: List[str]) -> Dict:
+        """Sort locally parsed skills into the skills_analysis lists, adding any from the summary."""
+        prompt = _prompt(
+            """Sort the skills below, parsed from the resume's skills section, into technical skills, soft skills and tools and technologies. Keep every listed skill, and add any further skills evident in the resume summary.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in a 'skills_analysis' key as shown below.\n\nListed skills:\n{known_skills}\n\nResume summary:\n{resume_text}\n\nReturn format:\n{{\n    \"skills_analysis\": {{\n        \"technical_skills\": [],\n        \"soft_skills\": [],\n        \"tools_and_technologies\": []\n    }}\n}}\n"""
+        )
+        
+        result = self._run_chain('extract_skills', prompt, known_skills=", ".join(known_skills), resume_text=summary or "(none)")
+        parsed = extract_json_with_key(result, 'skills_analysis')
+        skills = parsed.get('skills_analysis')
+        if not validate_section('skills_analysis', skills):
+            return parsed
+        # The parsed list is authoritative: nothing the resume lists may go missing
+        placed = {s.lower() for key in ("technical_skills", "soft_skills", "tools_and_technologies") for s in skills[key]}
+        skills["technical_skills"].extend(s for s in known_skills if s.lower() not in placed)
+        return parsed
+    
     def _extract_experience(self, resume_text: str) -> List[Dict]:
         """Extract work experience from resume text."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Extract work experience from the following resume text.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in an 'experience_analysis' key as shown below.\n\nResume text:\n{resume_text}\n\nReturn format:\n{{\n    \"experience_analysis\": [\n        {{\n            \"company\": \"\",\n            \"title\": \"\",\n            \"dates\": \"\",\n            \"responsibilities\": []\n        }}\n    ]\n}}\n"""
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(resume_text=resume_text)
+        result = self._run_chain('extract_experience', prompt, resume_text=resume_text)
         return extract_json_with_key(result, 'experience_analysis')
     
     def _analyze_job_requirements(self, job_description: str) -> Dict:
         """Analyze job requirements from job description."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Analyze the following job description and extract key requirements.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in a 'job_requirements' key as shown below.\n\nJob description:\n{job_description}\n\nReturn format:\n{{\n    \"job_requirements\": {{\n        \"required_skills\": [],\n        \"preferred_skills\": [],\n        \"responsibilities\": [],\n        \"qualifications\": []\n    }}\n}}\n"""
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(job_description=job_description)
+        result = self._run_chain('analyze_job_requirements', prompt, job_description=job_description)
         return extract_json_with_key(result, 'job_requirements')
     
     def _generate_tailored_bullets(self, resume_text: str, job_description: str) -> List[str]:
         """Generate tailored bullet points for resume."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Generate tailored bullet points for the resume based on the job description.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in a 'tailored_bullets' key as shown below.\n\nResume text:\n{resume_text}\n\nJob description:\n{job_description}\n\nReturn format:\n{{\n    \"tailored_bullets\": [\n        \"Bullet point 1\",\n        \"Bullet point 2\",\n        ...\n    ]\n}}\n"""
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(resume_text=resume_text, job_description=job_description)
+        result = self._run_chain('generate_tailored_bullets', prompt, resume_text=resume_text, job_description=job_description)
         return extract_json_with_key(result, 'tailored_bullets')
     
     def _calculate_fit_score(self, resume_text: str, job_description: str) -> Dict:
         """Calculate fit score between resume and job."""
-        prompt = ChatPromptTemplate.from_template(
+        prompt = _prompt(
             """Calculate a fit score between the resume and job description.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in a 'fit_analysis' key as shown below.\n\nResume text:\n{resume_text}\n\nJob description:\n{job_description}\n\nReturn format:\n{{\n    \"fit_analysis\": {{\n        \"overall_score\": 0-100,\n        \"skills_match\": 0-100,\n        \"experience_match\": 0-100,\n        \"missing_requirements\": [],\n        \"strengths\": [],\n        \"areas_for_improvement\": []\n    }}\n}}\n"""
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(resume_text=resume_text, job_description=job_description)
+        result = self._run_chain('calculate_fit_score', prompt, resume_text=resume_text, job_description=job_description)
         return extract_json_with_key(result, 'fit_analysis')
     
+    def _extract_combined(self, resume_text: str, job_description: str, keys: List[str]) -> Dict:
+        """Extract several analysis sections from the resume in one structured call."""
+        formats = ",\n    ".join(SECTION_FORMATS[key] for key in keys)
+        key_list = ", ".join(f"'{key}'" for key in keys)
+        needs_job = any(COMBINABLE_KEYS[key] for key in keys)
+        job_block = "\n\nJob description:\n{job_description}" if needs_job else ""
+        prompt = _prompt(
+            """Analyze the following resume""" + (" against the job description" if needs_job else "") +
+            f""" and return these sections in one JSON object: {key_list}.\nExtract skills and experience from the resume; tailor bullet points and score the fit against the job description.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\n\nResume text:\n{{resume_text}}""" +
+            job_block +
+            f"""\n\nReturn format:\n{{{{\n    {formats}\n}}}}\n"""
+        )
+        
+        inputs = {"resume_text": resume_text}
+        if needs_job:
+            inputs["job_description"] = job_description
+        result = self._run_chain('extract_combined', prompt, **inputs)
+        # Any one section is enough to accept the object; missing ones are retried per stage
+        for key in keys:
+            parsed = extract_json_with_key(result, key)
+            if parsed:
+                return parsed
+        return {}
+    
     def _refine_analysis(self, analysis_results: Dict, job_description: str) -> Dict:
-        """Refine the analysis results for better accuracy and relevance."""
-        prompt = ChatPromptTemplate.from_template(
-            """Refine the following resume analysis results to better match the job description.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nThe JSON object MUST be wrapped in the keys as shown below.\n\nAnalysis results:\n{analysis_results}\n\nJob description:\n{job_description}\n\nReturn format:\n{{\n    \"skills_analysis\": {{\n        \"technical_skills\": [],\n        \"soft_skills\": [],\n        \"tools_and_technologies\": []\n    }},\n    \"experience_analysis\": [\n        {{\n            \"company\": \"\",\n            \"title\": \"\",\n            \"dates\": \"\",\n            \"responsibilities\": []\n        }}\n    ],\n    \"job_requirements\": {{\n        \"required_skills\": [],\n        \"preferred_skills\": [],\n        \"responsibilities\": [],\n        \"qualifications\": []\n    }},\n    \"tailored_bullets\": [],\n    \"fit_analysis\": {{\n        \"overall_score\": 0-100,\n        \"skills_match\": 0-100,\n        \"experience_match\": 0-100,\n        \"missing_requirements\": [],\n        \"strengths\": [],\n        \"areas_for_improvement\": []\n    }}\n}}\n"""
+        """Refine the analysis results for better accuracy and relevance.
+        
+        The analysis is sent as compact JSON and the model returns only the
+        changes, as JSON Patch operations or whole-section overrides. Changes
+        are applied locally; a section that fails validation afterwards keeps
+        its original value.
+        """
+        prompt = _prompt(
+            """Review the following resume analysis against the job description and return ONLY the changes needed to make it more accurate and relevant.\nReturn ONLY valid JSON, using double quotes for all keys and string values, and do not use triple quotes or multiline strings. Do not include markdown or explanations.\nUse JSON Patch operations (op is \"add\", \"remove\" or \"replace\"; path is a JSON Pointer into the analysis, use /- to append to a list) in 'changes'. To rewrite a whole section, put it under 'overrides' instead. Leave both empty if nothing needs to change.\n\nAnalysis results:\n{analysis_results}\n\nJob description:\n{job_description}\n\nReturn format:\n{{\n    \"changes\": [\n        {{\"op\": \"add\", \"path\": \"/skills_analysis/technical_skills/-\", \"value\": \"\"}}\n    ],\n    \"overrides\": {{}}\n}}\n"""
         )
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        result = chain.run(analysis_results=str(analysis_results), job_description=job_description)
-        return extract_json_with_key(result, 'skills_analysis')
+        compact = json.dumps(analysis_results, separators=(',', ':'), ensure_ascii=False)
+        result = self._run_chain('refine_analysis', prompt, analysis_results=compact, job_description=job_description)
+        delta = extract_json_with_key(result, 'changes') or extract_json_with_key(result, 'overrides')
+        
+        refined = dict(analysis_results)
+        overrides = delta.get("overrides") or {}
+        if isinstance(overrides, dict):
+            for key, value in overrides.items():
+                if key in analysis_results:
+                    refined[key] = value
+        
+        changes = delta.get("changes") or []
+        try:
+            if not isinstance(changes, list):
+                raise JsonPatchError("changes is not a list")
+            # Whole-section rewrites belong in overrides; never let a patch replace the document root
+            if any(isinstance(op, dict) and op.get("path") == "" for op in changes):
+                raise JsonPatchError("patch targets the document root")
+            patched = apply_patch(refined, changes)
+            if not isinstance(patched, dict):
+                raise JsonPatchError("patch did not produce an object")
+            refined = patched
+        except JsonPatchError as e:
+            print("DEBUG: Discarding refinement patch:", e)
+        
+        # Keep only sections that are still well formed
+        for key, original in analysis_results.items():
+            if key not in refined or not validate_section(key, refined[key]):
+                refined[key] = original
+        return {key: refined[key] for key in analysis_results}
     
-    def analyze_resume(self, resume_text: str, job_description: str) -> Dict:
-        """Perform comprehensive resume analysis and refinement."""
-        # Initial analysis
-        skills = self._extract_skills(resume_text)
-        experience = self._extract_experience(resume_text)
-        requirements = self._analyze_job_requirements(job_description)
-        tailored_bullets = self._generate_tailored_bullets(resume_text, job_description)
-        fit_score = self._calculate_fit_score(resume_text, job_description)
-        
-        # Combine results
-        initial_analysis = {
-            "skills_analysis": skills.get("skills_analysis", {}),
-            "experience_analysis": experience.get("experience_analysis", []),
-            "job_requirements": requirements.get("job_requirements", {}),
-            "tailored_bullets": tailored_bullets.get("tailored_bullets", []),
-            "fit_analysis": fit_score.get("fit_analysis", {})
+    def _stage_inputs(self, resume_text: str) -> Dict[str, Any]:
+        """Parse the resume once and build the trimmed resume text each stage needs.
+        
+        Returns the parsed sections alongside the per-stage texts. Stages fall
+        back to the full resume text when the segmenter could not find the
+        sections they rely on. When a skills list was parsed, the skills stage
+        gets it pre-filled and only the summary as text.
+        """
+        sections = parse_resume(resume_text)
+        
+        def pick(keys: List[str]) -> str:
+            if not any(sections.get(key) for key in keys if key != "summary"):
+                return resume_text
+            return render_sections(sections, keys)
+        
+        return {
+            "sections": sections,
+            "skills": sections["summary"] if sections.get("skills") else pick(["summary", "skills"]),
+            "experience": pick(["experience"]),
+            "bullets": pick(["summary", "skills", "experience"]),
+            "fit": pick(["summary", "skills", "experience", "education", "other"]),
         }
+    
+    def _run_stage(self, key: str, inputs: Dict[str, str], job_description: str) -> Dict:
+        """Run the per-stage prompt that produces one analysis section."""
+        if key == "skills_analysis":
+            return self._extract_skills(inputs["skills"], inputs["sections"].get("skills"))
+        if key == "experience_analysis":
+            return self._extract_experience(inputs["experience"])
+        if key == "job_requirements":
+            return self._analyze_job_requirements(job_description)
+        if key == "tailored_bullets":
+            return self._generate_tailored_bullets(inputs["bullets"], job_description)
+        return self._calculate_fit_score(inputs["fit"], job_description)
+    
+    def _combined_stage(self, inputs: Dict, job_description: str) -> Dict:
+        """Fetch the combined keys in one call and keep only the sections that validate."""
+        keys = [
+            key for key in self.combined_keys
+            if not (key == "experience_analysis" and experience_is_complete(inputs["sections"]))
+        ]
+        # Sections missing from the result are handled by their own stages, which check the deadline too
+        if not keys or not self.router.fits('extract_combined', self.deadline_at):
+            return {}
+        try:
+            combined = self._extract_combined(inputs["fit"], job_description, keys)
+        except Exception as e:
+            self._stage_failed("combined_extraction", e)
+            return {}
+        return {key: combined[key] for key in keys if validate_section(key, combined.get(key))}
+    
+    def _section_stage(self, key: str, results: Dict, job_description: str):
+        """Produce one analysis section from the local parse, the combined call or its own prompt."""
+        inputs = results.get("resume_inputs", {})
+        if key == "experience_analysis" and experience_is_complete(inputs["sections"]):
+            return inputs["sections"]["experience"]
+        if "combined_extraction" in results:
+            if key in results["combined_extraction"]:
+                return results["combined_extraction"][key]
+            self._fallback_keys.append(key)
+        # Degrade instead of waiting on a call that would likely overrun the
+        # deadline, or when the call timed out, hit a provider error or was
+        # refused by an open circuit breaker
+        if not self.router.fits(SECTION_ROUTES[key], self.deadline_at):
+            return self._degraded_section(key, inputs)
+        try:
+            return self._run_stage(key, inputs, job_description).get(key, _empty_section(key))
+        except Exception as e:
+            self._stage_failed(key, e)
+            return self._degraded_section(key, inputs)
+    
+    def _stage_failed(self, name: str, error: Exception) -> None:
+        """Record why a stage's call failed if the failure is transient; re-raise any other error."""
+        cause = transient_cause(error)
+        if cause is None:
+            raise error
+        print(f"DEBUG: {name} failed ({cause}):", error)
+        self.stage_errors[name] = cause
+    
+    def _degraded_section(self, key: str, inputs: Dict):
+        """Stand in for a section from the local parse, or leave it empty, and mark it as such."""
+        local = _local_section(key, inputs.get("sections", {}))
+        self._section_status[key] = "missing" if local is None else "local"
+        return _empty_section(key) if local is None else local
+    
+    def _refine_stage(self, results: Dict, job_description: str) -> Optional[Dict]:
+        """Refine the finished sections, or return None when refinement would overrun the deadline or fails transiently."""
+        if not self.router.fits('refine_analysis', self.deadline_at):
+            return None
+        try:
+            return self._refine_analysis({key: results[key] for key in ANALYSIS_KEYS}, job_description)
+        except Exception as e:
+            self._stage_failed("refined_analysis", e)
+            return None
+    
+    def add_stages(self, graph: StageGraph, resume_text: str, job_description: str,
+                   known_sections: Dict = None, deadline_at: Optional[float] = None) -> str:
+        """Declare this agent's stages on a StageGraph and return the name of the final stage.
         
-        # Refine results
-        refined_analysis = self._refine_analysis(initial_analysis, job_description)
+        Each analysis section becomes a stage named after its key, depending
+        only on the inputs it really needs; refinement waits for all of them.
+        Sections in known_sections (e.g. a reused job profile) skip their LLM call.
+        With deadline_at (a time.perf_counter() value), each stage checks the
+        route's recorded p95 latency before calling the model and degrades to
+        a local variant, or skips refinement, when the call would not fit.
+        Stages that degrade because their call failed transiently are listed
+        with the cause in stage_errors; any other error fails the run.
+        """
+        known_sections = known_sections or {}
+        self.cancel_event = graph.cancel_event
+        self.deadline_at = deadline_at
+        self._fallback_keys = []
+        self._section_status = {}
+        self.stage_errors = {}
+        graph.add("resume_inputs", lambda results: self._stage_inputs(resume_text))
+        if self.combined_extraction:
+            graph.add(
+                "combined_extraction",
+                lambda results: self._combined_stage(results["resume_inputs"], job_description),
+                deps=["resume_inputs"]
+            )
+        
+        for key in ANALYSIS_KEYS:
+            if key in known_sections:
+                graph.add(key, lambda results, value=known_sections[key]: value)
+                continue
+            if key == "job_requirements":
+                deps = []
+            elif self.combined_extraction and key in self.combined_keys:
+                deps = ["resume_inputs", "combined_extraction"]
+            else:
+                deps = ["resume_inputs"]
+            graph.add(key, lambda results, key=key: self._section_stage(key, results, job_description), deps=deps)
+        
+        graph.add(
+            "refined_analysis",
+            lambda results: self._refine_stage(results, job_description),
+            deps=list(ANALYSIS_KEYS)
+        )
+        return "refined_analysis"
+    
+    def collect_results(self, graph: StageGraph) -> Tuple[Dict, Dict[str, str]]:
+        """Assemble the analysis from the stages that finished, with a completeness marker per section.
+        
+        Markers are "complete" (refined), "unrefined" (refinement skipped or
+        cut off by the deadline), "local" (taken from the local resume parse
+        without the LLM) and "missing" (left empty).
+        """
+        refined = graph.results.get("refined_analysis")
+        sections = (graph.results.get("resume_inputs") or {}).get("sections", {})
+        analysis, completeness = {}, {}
+        for key in ANALYSIS_KEYS:
+            if key in graph.results:
+                analysis[key] = graph.results[key] if refined is None else refined[key]
+                status = self._section_status.get(key)
+                completeness[key] = status or ("unrefined" if refined is None else "complete")
+                continue
+            local = _local_section(key, sections)
+            analysis[key] = _empty_section(key) if local is None else local
+            completeness[key] = "missing" if local is None else "local"
+        return analysis, completeness
+    
+    def stage_updates(self, name: str, result) -> List[Tuple[str, Any, str]]:
+        """Translate a finished stage into (section key, value, completeness) updates for display."""
+        if name in ANALYSIS_KEYS:
+            return [(name, result, self._section_status.get(name, "unrefined"))]
+        if name == "refined_analysis" and result is not None:
+            return [(key, result[key], self._section_status.get(key, "complete")) for key in ANALYSIS_KEYS]
+        return []
+    
+    def iter_analysis(self, resume_text: str, job_description: str,
+                      deadline: Optional[float] = None) -> Iterator[Tuple[str, Any, str]]:
+        """Run the analysis, yielding (section key, value, completeness) as each section becomes available.
+        
+        Sections arrive unrefined as soon as their own stage finishes, then
+        again in refined form. If the deadline cuts the run short, sections
+        that never arrived are yielded last in degraded form. Closing the
+        iterator early cancels the remaining stages. Stats are in
+        last_run_stats once it is exhausted.
+        """
+        calls_before = self.llm_calls
+        deadline_at = None if deadline is None else time.perf_counter() + deadline
+        graph = StageGraph()
+        self.add_stages(graph, resume_text, job_description, deadline_at=deadline_at)
+        try:
+            for name, result in graph.iter_run(deadline_at):
+                yield from self.stage_updates(name, result)
+        finally:
+            if len(graph.results) < len(graph.stages):
+                graph.cancel()
+        
+        analysis, completeness = self.collect_results(graph)
+        for key in ANALYSIS_KEYS:
+            if key not in graph.results:
+                yield key, analysis[key], completeness[key]
+        
+        self.last_run_stats = {
+            "mode": "combined" if self.combined_extraction else "per_stage",
+            "llm_calls": self.llm_calls - calls_before,
+            "fallback_keys": list(self._fallback_keys),
+            "stage_errors": dict(self.stage_errors),
+            "wall_clock_seconds": graph.wall_clock_seconds(),
+            "deadline_expired": graph.expired,
+        }
+    
+    def analyze_resume(self, resume_text: str, job_description: str, deadline: Optional[float] = None) -> Dict:
+        """Perform comprehensive resume analysis and refinement, running independent stages in parallel.
         
-        return refined_analysis 
\ No newline at end of file
+        With a deadline (seconds from now), stages that would not fit are
+        degraded or skipped and whatever is finished when it passes is
+        returned. The "completeness" entry marks how complete each section is.
+        """
+        latest = {}
+        for key, value, status in self.iter_analysis(resume_text, job_description, deadline):
+            latest[key] = (value, status)
+        analysis = {key: latest[key][0] for key in ANALYSIS_KEYS}
+        analysis["completeness"] = {key: latest[key][1] for key in ANALYSIS_KEYS}
+        return analysis
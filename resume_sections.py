@@ -0,0 +1,170 @@
+import copy
+import re
+from functools import lru_cache
+from typing import Dict, List, Any
+from utils.text_processor import TextProcessor
+
+# Heading keywords mapped to the section they start
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "about me"],
+    "skills": ["skills", "technologies", "competencies", "tech stack"],
+    "experience": ["experience", "employment", "work history", "career history"],
+    "education": ["education", "academic"],
+}
+
+def _classify_heading(line: str) -> str:
+    """Return the section name a heading line starts, or '' if it is not a heading."""
+    stripped = line.strip().rstrip(':').strip()
+    if not stripped or len(stripped) > 40 or TextProcessor.is_bullet(line):
+        return ""
+    lowered = stripped.lower()
+    for section, keywords in SECTION_HEADINGS.items():
+        if any(keyword in lowered for keyword in keywords):
+            # Accept "Technical Skills" but not "Strong problem-solving skills and ..."
+            if stripped.isupper() or line.strip().endswith(':') or len(lowered.split()) <= 3:
+                return section
+    # Any other short all-caps line (CERTIFICATIONS, PROJECTS, ...) is a heading we keep as "other"
+    if stripped.isupper() and len(stripped.split()) <= 4 and not re.search(r'[@|\d]', stripped):
+        return "other:" + stripped.title()
+    return ""
+
+def _parse_skills(lines: List[str]) -> List[str]:
+    """Flatten skill lines like 'Databases: PostgreSQL, MongoDB' into individual items."""
+    skills = []
+    for line in lines:
+        item = TextProcessor.strip_bullet(line)
+        if ':' in item:
+            item = item.split(':', 1)[1]
+        for skill in re.split(r'[,;|]', item):
+            skill = skill.strip().rstrip('.')
+            if skill and skill not in skills:
+                skills.append(skill)
+    return skills
+
+def _parse_experience(lines: List[str]) -> List[Dict[str, Any]]:
+    """Group experience lines into entries of title, company, dates and responsibilities."""
+    entries = []
+    header: List[str] = []
+    current = None
+    for line in lines:
+        if TextProcessor.is_bullet(line):
+            if current is None:
+                current = _experience_entry(header)
+                entries.append(current)
+                header = []
+            current["responsibilities"].append(TextProcessor.strip_bullet(line))
+        else:
+            current = None
+            header.append(line.strip())
+    if header:
+        entries.append(_experience_entry(header))
+    return entries
+
+def _experience_entry(header: List[str]) -> Dict[str, Any]:
+    """Build an experience entry from the non-bullet lines that precede its bullets."""
+    entry = {"company": "", "title": "", "dates": "", "responsibilities": []}
+    parts = []
+    for line in header:
+        parts.extend(p.strip() for p in re.split(r'\s+\|\s+', line) if p.strip())
+    for part in parts:
+        dates = TextProcessor.find_date_range(part)
+        if dates and not entry["dates"] and len(dates) >= len(part) - 2:
+            entry["dates"] = dates
+        elif not entry["title"]:
+            if ' at ' in part:
+                entry["title"], entry["company"] = [p.strip() for p in part.split(' at ', 1)]
+            else:
+                entry["title"] = part
+        elif not entry["company"]:
+            entry["company"] = part
+    return entry
+
+def _parse_contact(lines: List[str]) -> Dict[str, Any]:
+    """Pull name, headline and contact details from the lines above the first heading."""
+    text = "\n".join(lines)
+    emails = TextProcessor.extract_emails(text)
+    without_emails = text
+    for email in emails:
+        without_emails = without_emails.replace(email, " ")
+    plain = [
+        line.strip() for line in lines
+        if line.strip() and not TextProcessor.extract_emails(line) and not TextProcessor.extract_phone_numbers(line)
+    ]
+    return {
+        "name": plain[0] if plain else "",
+        "headline": plain[1] if len(plain) > 1 else "",
+        "emails": emails,
+        "phones": TextProcessor.extract_phone_numbers(text),
+        "links": TextProcessor.extract_urls(without_emails),
+    }
+
+@lru_cache(maxsize=256)
+def _parse_resume_cached(resume_text: str) -> Dict[str, Any]:
+    """Segment a resume into sections; cached per resume text."""
+    buckets: Dict[str, List[str]] = {"contact": []}
+    current = "contact"
+    for line in resume_text.splitlines():
+        if not line.strip():
+            continue
+        section = _classify_heading(line)
+        # The name line at the top is often all caps; it is not a section heading
+        if section.startswith("other:") and current == "contact":
+            section = ""
+        if section:
+            current = section
+            buckets.setdefault(current, [])
+            continue
+        buckets.setdefault(current, []).append(line)
+
+    return {
+        "contact": _parse_contact(buckets.get("contact", [])),
+        "summary": " ".join(line.strip() for line in buckets.get("summary", [])),
+        "skills": _parse_skills(buckets.get("skills", [])),
+        "experience": _parse_experience(buckets.get("experience", [])),
+        "education": [TextProcessor.strip_bullet(line) for line in buckets.get("education", [])],
+        "other": {
+            name[len("other:"):]: [TextProcessor.strip_bullet(line) for line in lines]
+            for name, lines in buckets.items() if name.startswith("other:")
+        },
+    }
+
+def parse_resume(resume_text: str) -> Dict[str, Any]:
+    """Parse a resume once into contact, summary, skills, experience and education sections."""
+    return copy.deepcopy(_parse_resume_cached(resume_text))
+
+def experience_is_complete(sections: Dict[str, Any]) -> bool:
+    """Check whether locally parsed experience entries can be used without the LLM."""
+    entries = sections.get("experience", [])
+    return bool(entries) and all(
+        entry["title"] and entry["company"] and entry["dates"] and entry["responsibilities"]
+        for entry in entries
+    )
+
+def render_sections(sections: Dict[str, Any], keys: List[str]) -> str:
+    """Render only the requested sections as compact text for a prompt."""
+    blocks = []
+    for key in keys:
+        value = sections.get(key)
+        if not value:
+            continue
+        if key == "contact":
+            lines = [value.get("name", ""), value.get("headline", "")]
+            body = "\n".join(line for line in lines if line)
+        elif key == "summary":
+            body = value
+        elif key == "skills":
+            body = ", ".join(value)
+        elif key == "experience":
+            body = "\n".join(
+                f"{e['title']} | {e['company']} | {e['dates']}\n" + "\n".join(f"- {r}" for r in e["responsibilities"])
+                for e in value
+            )
+        elif key == "education":
+            body = "\n".join(value)
+        else:
+            body = "\n".join(
+                f"{name}: {'; '.join(items)}" for name, items in value.items()
+            )
+        if body:
+            blocks.append(f"{key.upper()}\n{body}")
+    return "\n\n".join(blocks)
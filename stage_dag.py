@@ -0,0 +1,185 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+class StageCancelled(Exception):
+    """Raised inside a stage, or by the graph, once the run has been cancelled."""
+
+class LinkedEvent(threading.Event):
+    """A cancel event that also reads as set once its parent is, so one call can be cancelled on its own.
+
+    Only is_set() follows the parent; wait() sees this event alone.
+    """
+    def __init__(self, parent: Optional[threading.Event] = None):
+        super().__init__()
+        self.parent = parent
+
+    def is_set(self) -> bool:
+        return super().is_set() or (self.parent is not None and self.parent.is_set())
+
+def run_cancellable(make_call: Callable[[], Awaitable[Any]], cancel_event: Optional[threading.Event],
+                    poll_seconds: float = 0.1) -> Any:
+    """Run an async model call on a private event loop and cancel it as soon as cancel_event is set.
+
+    Cancelling the task closes the in-flight request instead of waiting for
+    the answer, and raises StageCancelled. The provider may still finish
+    generating on its side; the client timeout bounds calls that cannot be
+    cancelled this way.
+    """
+    import asyncio
+
+    async def watch():
+        task = asyncio.ensure_future(make_call())
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if cancel_event is not None and cancel_event.is_set():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise StageCancelled("call cancelled in flight")
+
+    # Not asyncio.run: it waits for executor threads, which models without a native async call run in
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(watch())
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+class StageGraph:
+    """Runs named stages on a thread pool as soon as their dependencies have finished.
+
+    Each stage function receives a dict of the results of the stages it
+    depends on. End-to-end time is the critical path through the graph rather
+    than the sum of all stages. Calling cancel() (from any thread) stops
+    scheduling new stages and drops queued ones; long-running stages can poll
+    cancel_event, or make their calls through run_cancellable, to stop early.
+    A run given a deadline stops at that time without raising, cancels the
+    stages still running and leaves them out of results.
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize an empty graph; max_workers defaults to one thread per stage."""
+        self.max_workers = max_workers
+        self.stages: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], List[str]]] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.cancel_event = threading.Event()
+        self.expired = False
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Optional[List[str]] = None) -> None:
+        """Declare a stage and the stages whose results it needs."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        self.stages[name] = (func, list(deps or []))
+
+    def cancel(self) -> None:
+        """Cancel the run: no further stages start and queued ones are dropped."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def _check(self) -> None:
+        """Validate that every dependency exists and the graph has no cycles."""
+        for name, (_, deps) in self.stages.items():
+            for dep in deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        visiting, done = set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name][1]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _run_stage(self, name: str, inputs: Dict[str, Any]) -> Any:
+        """Run one stage, recording when it started and finished."""
+        if self.cancelled:
+            raise StageCancelled(name)
+        self.timings[name]["started"] = time.perf_counter()
+        try:
+            return self.stages[name][0](inputs)
+        finally:
+            self.timings[name]["finished"] = time.perf_counter()
+
+    def iter_run(self, deadline_at: Optional[float] = None,
+                 heartbeat: bool = False) -> Iterator[Tuple[Optional[str], Any]]:
+        """Run the graph, yielding (stage name, result) as each stage completes.
+
+        The first stage error cancels the rest of the run and is re-raised.
+        Closing the iterator early (or an exception in the consumer) also
+        cancels the run. When deadline_at (a time.perf_counter() value) passes,
+        the run stops quietly with expired set; stages still in flight are
+        cancelled and their results discarded. With heartbeat, (None, None) is
+        also yielded every time the loop wakes up (about every 0.1 s) without a
+        finished stage, so a consumer can react, or be interrupted, mid-call.
+        """
+        self._check()
+        pending = dict(self.stages)
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self.stages)))
+        try:
+            while pending or running:
+                if deadline_at is not None and time.perf_counter() >= deadline_at:
+                    self.expired = True
+                    return
+                if self.cancelled:
+                    raise StageCancelled("graph cancelled")
+
+                # Submit every stage whose dependencies are all done
+                for name in [n for n, (_, deps) in pending.items() if all(d in self.results for d in deps)]:
+                    deps = pending.pop(name)[1]
+                    inputs = {dep: self.results[dep] for dep in deps}
+                    self.timings[name] = {"queued": time.perf_counter()}
+                    running[executor.submit(self._run_stage, name, inputs)] = name
+
+                if not running:
+                    raise ValueError(f"Stages can never run: {sorted(pending)}")
+
+                # Wake up periodically so a cancel from another thread is noticed
+                timeout = 0.1
+                if deadline_at is not None:
+                    timeout = max(0.0, min(timeout, deadline_at - time.perf_counter()))
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if heartbeat and not done:
+                    yield None, None
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        self.errors[name] = error
+                        raise error
+                    self.results[name] = future.result()
+                    yield name, self.results[name]
+        finally:
+            if pending or running:
+                self.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, deadline_at: Optional[float] = None) -> Dict[str, Any]:
+        """Run the graph to completion (or the deadline) and return the results of finished stages."""
+        for _ in self.iter_run(deadline_at):
+            pass
+        return dict(self.results)
+
+    def wall_clock_seconds(self) -> float:
+        """Wall-clock time from the first stage queued to the last stage finished."""
+        starts = [t["queued"] for t in self.timings.values() if "queued" in t]
+        ends = [t["finished"] for t in self.timings.values() if "finished" in t]
+        return round(max(ends) - min(starts), 4) if starts and ends else 0.0
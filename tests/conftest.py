@@ -0,0 +1,30 @@
+import os
+import sys
+import pytest
+
+# The app imports its modules as utils.* and agents.* from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fake_llm import FakeLLM
+from utils.model_router import ModelRouter, DEFAULT_ROUTES
+
+class FakeModels:
+    """A router over the default routes whose factory builds a FakeLLM per distinct model config."""
+    def __init__(self, **llm_kwargs):
+        self.built = {}
+
+        def factory(config):
+            llm = FakeLLM(**llm_kwargs)
+            self.built.setdefault(config["model"], []).append(llm)
+            return llm
+
+        self.router = ModelRouter(DEFAULT_ROUTES, {"model": "gpt-4o", "temperature": 0.7}, factory)
+
+    def calls(self, model: str) -> int:
+        """Calls made to every client built for a model."""
+        return sum(llm.calls for llm in self.built.get(model, []))
+
+@pytest.fixture
+def fake_models():
+    """Build FakeModels with the given FakeLLM settings, e.g. fake_models(latency=0.5)."""
+    return FakeModels
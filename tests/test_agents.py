@@ -0,0 +1,207 @@
+import time
+import pytest
+from agents.resume_agent import ResumeAgent, ANALYSIS_KEYS, COMBINABLE_KEYS
+from agents.cover_letter_agent import CoverLetterAgent
+from utils.fake_llm import FakeLLM, FAKE_SECTIONS
+from utils.resilience import Resilience
+from utils.stage_dag import StageGraph
+
+RESUME = """JANE SMITH
+Data Engineer
+jane@example.com
+
+SUMMARY
+Data engineer building batch and streaming pipelines.
+
+SKILLS
+Python, SQL, Airflow
+
+EXPERIENCE
+Built reporting pipelines and cut warehouse costs.
+"""
+
+JOB = "We need a data engineer with Python, SQL and AWS experience to build pipelines."
+
+def test_resume_analysis_routes_stages(fake_models):
+    models = fake_models()
+    router = models.router
+    agent = ResumeAgent(router)
+    analysis = agent.analyze_resume(RESUME, JOB)
+
+    # Parsed skills the model left out are kept
+    assert analysis["skills_analysis"]["technical_skills"] == ["Python", "SQL", "Airflow"]
+    assert analysis["job_requirements"] == FAKE_SECTIONS["job_requirements"]
+    assert analysis["tailored_bullets"] == FAKE_SECTIONS["tailored_bullets"]
+    assert analysis["fit_analysis"] == FAKE_SECTIONS["fit_analysis"]
+    assert analysis["completeness"] == {key: "complete" for key in ANALYSIS_KEYS}
+
+    # Extraction and scoring go to the small model, bullets and refinement to the default one
+    summary = router.latency_summary()
+    for route in ("extract_skills", "extract_experience", "analyze_job_requirements", "calculate_fit_score"):
+        assert summary[route]["model"] == "gpt-4o-mini" and summary[route]["calls"] == 1
+    for route in ("generate_tailored_bullets", "refine_analysis"):
+        assert summary[route]["model"] == "gpt-4o" and summary[route]["calls"] == 1
+    assert models.calls("gpt-4o-mini") == 4
+    assert models.calls("gpt-4o") == 2
+    assert agent.last_run_stats["llm_calls"] == 6
+
+def test_complete_local_experience_skips_its_call(fake_models):
+    resume = RESUME.replace(
+        "Built reporting pipelines and cut warehouse costs.",
+        "Data Engineer\nAcme Analytics | March 2021 - Present\n• Built reporting pipelines"
+    )
+    router = fake_models().router
+    analysis = ResumeAgent(router).analyze_resume(resume, JOB)
+    assert "extract_experience" not in router.latency_summary()
+    assert analysis["experience_analysis"][0]["company"] == "Acme Analytics"
+
+def test_combined_extraction_uses_one_call(fake_models):
+    router = fake_models().router
+    agent = ResumeAgent(router, combined_extraction=True)
+    analysis = agent.analyze_resume(RESUME, JOB)
+    summary = router.latency_summary()
+    assert summary["extract_combined"]["calls"] == 1
+    assert "extract_skills" not in summary and "extract_experience" not in summary
+    assert analysis["skills_analysis"] == FAKE_SECTIONS["skills_analysis"]
+    assert agent.last_run_stats["fallback_keys"] == []
+
+def test_resume_deadline_returns_degraded_sections(fake_models):
+    router = fake_models(latency=1.0).router
+    agent = ResumeAgent(router)
+    analysis = agent.analyze_resume(RESUME, JOB, deadline=0.2)
+    assert agent.last_run_stats["deadline_expired"]
+    assert set(analysis["completeness"].values()) <= {"local", "missing"}
+    # The local parse still provides the skills list
+    assert analysis["skills_analysis"]["technical_skills"] == ["Python", "SQL", "Airflow"]
+
+def test_deadline_cancels_calls_in_flight(fake_models):
+    router = fake_models(latency=2.0).router
+    graph = StageGraph()
+    deadline_at = time.perf_counter() + 0.2
+    ResumeAgent(router).add_stages(graph, RESUME, JOB, deadline_at=deadline_at)
+    graph.run(deadline_at)
+    time.sleep(0.3)
+    # Every started stage gave up its call soon after the deadline instead of waiting for the model
+    started = [t for t in graph.timings.values() if "started" in t]
+    assert started and all(t.get("finished", float("inf")) < deadline_at + 0.5 for t in started)
+
+def test_cover_letter_runs_every_pass(fake_models):
+    models = fake_models()
+    router = models.router
+    letter = CoverLetterAgent(router).generate_optimized_cover_letter(RESUME, JOB)
+    assert letter["final_letter"] == FAKE_SECTIONS["enhanced_letter"]
+    assert letter["completeness"] == {
+        "initial_cover_letter": "complete",
+        "ats_optimized": "complete",
+        "tone_refined": "complete",
+        "enhanced": "complete",
+    }
+    assert letter["analysis"]["key_achievements"] == FAKE_SECTIONS["key_achievements"]
+    summary = router.latency_summary()
+    assert summary["optimize_cover_letter"]["model"] == "gpt-4o"
+    assert models.calls("gpt-4o") == 4
+
+def test_cover_letter_deadline_marks_missing_passes(fake_models):
+    router = fake_models(latency=0.3).router
+    letter = CoverLetterAgent(router).generate_optimized_cover_letter(RESUME, JOB, deadline=0.1)
+    assert letter["final_letter"] == ""
+    assert set(letter["completeness"].values()) == {"missing"}
+
+def timing_out_router(fake_models):
+    router = fake_models(latency=0.5).router
+    router.resilience = Resilience(timeout=0.05, hedge_percentile=None, failure_threshold=100)
+    return router
+
+def test_timeouts_degrade_sections_and_record_the_cause(fake_models):
+    agent = ResumeAgent(timing_out_router(fake_models))
+    analysis = agent.analyze_resume(RESUME, JOB)
+    assert analysis["completeness"] == {
+        "skills_analysis": "local",
+        "experience_analysis": "local",
+        "job_requirements": "missing",
+        "tailored_bullets": "missing",
+        "fit_analysis": "missing",
+    }
+    assert analysis["skills_analysis"]["technical_skills"] == ["Python", "SQL", "Airflow"]
+    assert agent.last_run_stats["stage_errors"] == dict.fromkeys(ANALYSIS_KEYS + ("refined_analysis",), "timeout")
+
+def test_timeouts_fail_cover_letter_passes(fake_models):
+    agent = CoverLetterAgent(timing_out_router(fake_models))
+    letter = agent.generate_optimized_cover_letter(RESUME, JOB)
+    assert letter["final_letter"] == ""
+    assert letter["completeness"] == {
+        "initial_cover_letter": "failed",
+        "ats_optimized": "skipped",
+        "tone_refined": "skipped",
+        "enhanced": "skipped",
+    }
+    assert agent.stage_errors == {"initial_cover_letter": "timeout"}
+
+def test_other_backend_errors_fail_the_run(fake_models):
+    router = fake_models(error_rate=1.0).router
+    with pytest.raises(RuntimeError, match="Injected"):
+        ResumeAgent(router).analyze_resume(RESUME, JOB)
+    with pytest.raises(RuntimeError, match="Injected"):
+        CoverLetterAgent(router).generate_optimized_cover_letter(RESUME, JOB)
+
+@pytest.mark.parametrize("changes", [
+    [{"op": "replace", "path": "", "value": []}],
+    [{"op": "add", "path": "", "value": "rewritten"}],
+    {"op": "add", "path": "/tailored_bullets/-", "value": "Not a list of operations"},
+])
+def test_refinement_never_replaces_the_analysis(fake_models, changes):
+    router = fake_models(sections=dict(FAKE_SECTIONS, changes=changes)).router
+    analysis = ResumeAgent(router).analyze_resume(RESUME, JOB)
+    assert analysis["tailored_bullets"] == FAKE_SECTIONS["tailored_bullets"]
+    assert analysis["completeness"] == {key: "complete" for key in ANALYSIS_KEYS}
+
+def test_refinement_applies_patches(fake_models):
+    changes = [{"op": "add", "path": "/tailored_bullets/-", "value": "Led the warehouse migration"}]
+    router = fake_models(sections=dict(FAKE_SECTIONS, changes=changes)).router
+    analysis = ResumeAgent(router).analyze_resume(RESUME, JOB)
+    assert analysis["tailored_bullets"] == FAKE_SECTIONS["tailored_bullets"] + ["Led the warehouse migration"]
+
+def test_skills_stage_sends_the_summary_with_the_parsed_list(fake_models):
+    models = fake_models()
+    agent = ResumeAgent(models.router)
+    inputs = agent._stage_inputs(RESUME)
+    assert inputs["skills"] == "Data engineer building batch and streaming pipelines."
+    result = agent._run_stage("skills_analysis", inputs, JOB)
+    prompt = models.built["gpt-4o-mini"][0].last_prompt
+    assert "Listed skills:\nPython, SQL, Airflow" in prompt
+    assert "Built reporting pipelines" not in prompt
+    # The model left Airflow out; the parsed list puts it back
+    assert result["skills_analysis"]["technical_skills"] == ["Python", "SQL", "Airflow"]
+
+def test_skills_stage_without_a_skills_section_sends_the_resume(fake_models):
+    agent = ResumeAgent(fake_models().router)
+    inputs = agent._stage_inputs(RESUME.replace("SKILLS\nPython, SQL, Airflow\n", ""))
+    assert "Built reporting pipelines" in inputs["skills"]
+
+def test_combined_extraction_keeps_generative_sections_on_their_model(fake_models):
+    models = fake_models()
+    agent = ResumeAgent(models.router, combined_extraction=True,
+                        combined_keys=("skills_analysis", "tailored_bullets", "fit_analysis"))
+    # Scoring shares the small extraction model; bullets stay on the default model
+    assert agent.combined_keys == ("skills_analysis", "fit_analysis")
+    analysis = agent.analyze_resume(RESUME, JOB)
+    summary = models.router.latency_summary()
+    assert summary["generate_tailored_bullets"]["model"] == "gpt-4o"
+    assert "calculate_fit_score" not in summary
+    assert analysis["tailored_bullets"] == FAKE_SECTIONS["tailored_bullets"]
+
+def test_single_model_router_combines_every_requested_section():
+    agent = ResumeAgent(FakeLLM(), combined_extraction=True, combined_keys=tuple(COMBINABLE_KEYS))
+    assert agent.combined_keys == tuple(COMBINABLE_KEYS)
+
+def test_unparsable_letter_pass_is_failed_and_later_passes_continue(fake_models):
+    sections = {key: value for key, value in FAKE_SECTIONS.items() if key != "optimized_letter"}
+    router = fake_models(sections=sections).router
+    letter = CoverLetterAgent(router).generate_optimized_cover_letter(RESUME, JOB)
+    assert letter["completeness"] == {
+        "initial_cover_letter": "complete",
+        "ats_optimized": "failed",
+        "tone_refined": "complete",
+        "enhanced": "complete",
+    }
+    assert letter["final_letter"] == FAKE_SECTIONS["enhanced_letter"]
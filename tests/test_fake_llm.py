@@ -0,0 +1,28 @@
+import threading
+from utils.fake_llm import FakeLLM
+from utils.model_router import ModelRouter
+
+def test_provider_slots_queue_calls_by_route():
+    llm = FakeLLM(latency=0.2, max_concurrency=1)
+    router = ModelRouter.single(llm)
+    threads = [
+        threading.Thread(target=router.invoke, args=(route, lambda cancel: llm._call("prompt")))
+        for route in ("extract_skills", "refine_tone")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    waits = llm.queue_waits_by_route()
+    assert set(waits) == {"extract_skills", "refine_tone"}
+    # One call had the slot straight away, the other waited for it
+    first, second = sorted(route_waits[0] for route_waits in waits.values())
+    assert first < 0.05 and second >= 0.15
+    assert sorted(llm.queue_waits()) == [first, second]
+    assert llm.queue_waits("refine_tone") == waits["refine_tone"]
+
+def test_unlimited_provider_does_not_queue():
+    llm = FakeLLM()
+    llm._call("prompt")
+    assert llm.queue_waits_by_route().keys() == {""}
+    assert llm.queue_waits()[0] < 0.01
@@ -0,0 +1,79 @@
+import io
+import zipfile
+from utils.file_handler import FileHandler
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+MC = 'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+TAB_STOPS = '<w:pPr><w:tabs><w:tab w:val="left" w:pos="0"/><w:tab w:val="right" w:pos="9360"/></w:tabs></w:pPr>'
+
+def paragraph(*runs: str, tab_stops: bool = False) -> str:
+    """A paragraph of runs; '\\t' becomes a run holding a tab."""
+    body = ''.join('<w:r><w:tab/></w:r>' if run == '\t' else f'<w:r><w:t>{run}</w:t></w:r>' for run in runs)
+    return f'<w:p>{TAB_STOPS if tab_stops else ""}{body}</w:p>'
+
+def table(rows) -> str:
+    cells = lambda row: ''.join(f'<w:tc>{paragraph(text)}</w:tc>' for text in row)
+    return '<w:tbl>' + ''.join(f'<w:tr>{cells(row)}</w:tr>' for row in rows) + '</w:tbl>'
+
+def make_docx(body: str, header: str = '') -> bytes:
+    """Build a minimal DOCX with the given body XML and optional header XML."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document {W} {MC}><w:body>{body}</w:body></w:document>')
+        if header:
+            archive.writestr('word/header1.xml', f'<w:hdr {W}>{header}</w:hdr>')
+    return buffer.getvalue()
+
+RESUME_DOCX = make_docx(
+    paragraph('Senior Engineer', '\t', 'Jan 2020 - Present', tab_stops=True)
+    + paragraph('Plain line', tab_stops=True)
+    + table([['Skill', 'Years'], ['Python', '5']]),
+    header=paragraph('JANE SMITH'),
+)
+
+def test_docx_fast_reads_headers_tables_and_tabs():
+    text = FileHandler.extract_text_from_docx_fast(RESUME_DOCX)
+    assert text == 'JANE SMITH\nSenior Engineer\tJan 2020 - Present\nPlain line\nSkill\tYears\nPython\t5\n'
+
+def test_docx_fast_reads_text_boxes_once():
+    text_box = (
+        '<w:p><w:r><mc:AlternateContent>'
+        f'<mc:Choice>{paragraph("Boxed")}</mc:Choice>'
+        f'<mc:Fallback>{paragraph("Boxed")}</mc:Fallback>'
+        '</mc:AlternateContent></w:r></w:p>'
+    )
+    assert FileHandler.extract_text_from_docx_fast(make_docx(text_box + paragraph('After'))) == 'Boxed\n\nAfter\n'
+
+def test_docx_fast_returns_none_for_a_broken_file():
+    assert FileHandler.extract_text_from_docx_fast(b'not a zip') is None
+
+def test_ingest_directory_parses_duplicates_once_and_caches(tmp_path):
+    source = tmp_path / "resumes"
+    (source / "nested").mkdir(parents=True)
+    (source / "a.docx").write_bytes(RESUME_DOCX)
+    (source / "nested" / "copy.docx").write_bytes(RESUME_DOCX)
+    (source / "other.docx").write_bytes(make_docx(paragraph("Other resume")))
+    (source / "broken.docx").write_bytes(b"not a zip")
+    (source / "notes.txt").write_text("ignored")
+    cache_dir = str(tmp_path / "cache")
+
+    manifest = FileHandler.ingest_directory(str(source), cache_dir=cache_dir, max_workers=2)
+    files = {entry["path"]: entry for entry in manifest["files"]}
+    assert manifest["total_files"] == 4
+    assert manifest["duplicate_files"] == 1
+    assert manifest["failed_files"] == 1
+    copy = files[str(source / "nested" / "copy.docx")]
+    assert copy["duplicate_of"] == str(source / "a.docx")
+    assert not files[str(source / "a.docx")]["cached"]
+    assert files[str(source / "broken.docx")]["error"]
+
+    digest = files[str(source / "a.docx")]["sha256"]
+    assert FileHandler.load_cached_text(digest, "docx", cache_dir) == FileHandler.extract_text_from_docx_fast(RESUME_DOCX)
+    assert FileHandler.load_cached_text(digest, "pdf", cache_dir) is None
+
+    again = FileHandler.ingest_directory(str(source), cache_dir=cache_dir, max_workers=2)
+    assert again["cached_files"] == 3
+
+def test_cache_from_an_older_extractor_is_not_served(tmp_path):
+    (tmp_path / ("0" * 64 + ".docx-v1.txt")).write_text("stale text")
+    assert FileHandler.load_cached_text("0" * 64, "docx", str(tmp_path)) is None
@@ -0,0 +1,36 @@
+import pytest
+from utils.json_patch import apply_patch, JsonPatchError
+
+def test_add_replace_remove():
+    doc = {"skills": ["Python"], "score": 70, "notes": "draft"}
+    result = apply_patch(doc, [
+        {"op": "add", "path": "/skills/-", "value": "SQL"},
+        {"op": "replace", "path": "/score", "value": 80},
+        {"op": "remove", "path": "/notes"},
+    ])
+    assert result == {"skills": ["Python", "SQL"], "score": 80}
+
+def test_input_is_not_modified():
+    doc = {"skills": ["Python"]}
+    apply_patch(doc, [{"op": "add", "path": "/skills/0", "value": "Go"}])
+    assert doc == {"skills": ["Python"]}
+
+def test_escaped_pointer_tokens():
+    result = apply_patch({"a/b": {"c~d": 1}}, [{"op": "replace", "path": "/a~1b/c~0d", "value": 2}])
+    assert result == {"a/b": {"c~d": 2}}
+
+def test_root_replace_returns_value():
+    assert apply_patch({"a": 1}, [{"op": "replace", "path": "", "value": [1]}]) == [1]
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "remove", "path": "/missing"}],
+    [{"op": "replace", "path": "/skills/5", "value": "Go"}],
+    [{"op": "move", "path": "/skills", "from": "/x"}],
+    [{"op": "add", "path": "/skills/-"}],
+    [{"op": "remove", "path": ""}],
+    [{"path": "/skills"}],
+    [{"op": "add", "path": "skills", "value": 1}],
+])
+def test_invalid_operations_raise(operations):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"skills": ["Python"]}, operations)
@@ -0,0 +1,55 @@
+import time
+from utils.fake_llm import FakeLLM
+from utils.model_router import ModelRouter, percentile
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) == 0.0
+
+def test_routes_pick_models_and_share_clients(fake_models):
+    models = fake_models()
+    router = models.router
+    assert router.config_for("extract_skills") == {"model": "gpt-4o-mini", "temperature": 0.0}
+    assert router.config_for("refine_tone") == {"model": "gpt-4o", "temperature": 0.7}
+    assert router.config_for("unlisted") == {"model": "gpt-4o", "temperature": 0.7}
+    assert router.get("extract_skills") is router.get("calculate_fit_score")
+    assert router.get("extract_skills") is not router.get("refine_tone")
+    assert router.get("refine_tone") is router.get("enhance_impact")
+    # Same model at a different temperature is a different client
+    assert router.get("refine_analysis") is not router.get("refine_tone")
+    assert set(models.built) == {"gpt-4o-mini", "gpt-4o"}
+
+def test_single_router_uses_one_model():
+    llm = FakeLLM()
+    router = ModelRouter.single(llm)
+    assert router.get("extract_skills") is llm and router.get("refine_tone") is llm
+
+def test_invoke_records_latency_summary(fake_models):
+    router = fake_models(latency=0.02).router
+    for _ in range(3):
+        router.invoke("extract_skills", lambda cancel: router.get("extract_skills")._call("prompt"))
+    router.invoke("refine_tone", lambda cancel: router.get("refine_tone")._call("prompt"))
+    summary = router.latency_summary()
+    assert set(summary) == {"extract_skills", "refine_tone"}
+    assert summary["extract_skills"]["model"] == "gpt-4o-mini"
+    assert summary["extract_skills"]["calls"] == 3
+    assert summary["refine_tone"]["model"] == "gpt-4o"
+    stats = summary["extract_skills"]
+    assert 0.02 <= stats["p50"] <= stats["p95"] <= stats["max"]
+
+def test_estimate_and_fits(fake_models):
+    router = fake_models().router
+    for seconds in (0.1, 0.1, 0.2, 0.2, 1.0):
+        router.record("calculate_fit_score", seconds)
+    assert router.estimate("calculate_fit_score", 50) == 0.2
+    assert router.estimate("calculate_fit_score", 95) == 1.0
+    assert router.estimate("refine_tone") is None
+    now = time.perf_counter()
+    assert router.fits("calculate_fit_score", None)
+    assert router.fits("calculate_fit_score", now + 5)
+    assert not router.fits("calculate_fit_score", now + 0.5)
+    # Routes without history are assumed to fit
+    assert router.fits("refine_tone", now + 0.01)
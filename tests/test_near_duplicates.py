@@ -0,0 +1,56 @@
+from utils.near_duplicates import NearDuplicateIndex, NearDuplicateCache
+from utils.text_processor import TextProcessor
+
+WORDS = [f"word{i}" for i in range(200)]
+
+def test_index_finds_near_duplicates_only():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("base", WORDS)
+    index.add("other", [f"other{i}" for i in range(200)])
+    matches = index.query(WORDS[:195] + ["extra1", "extra2"])
+    assert [key for key, _ in matches] == ["base"]
+    assert matches[0][1] >= 0.8
+    assert index.query([f"new{i}" for i in range(200)]) == []
+
+def test_readding_a_key_is_ignored():
+    index = NearDuplicateIndex()
+    index.add("base", WORDS)
+    index.add("base", WORDS)
+    assert len(index) == 1
+
+def test_signature_is_deterministic():
+    index = NearDuplicateIndex()
+    assert index.signature(WORDS) == index.signature(list(reversed(WORDS)))
+
+def test_cache_lookup_reports_reuse():
+    cache = NearDuplicateCache(TextProcessor(), threshold=0.8)
+    job = "Senior Python engineer to build data pipelines with Airflow, Spark, SQL and AWS. " * 3
+    cache.store({"required_skills": ["Python"]}, job)
+    hit = cache.lookup(job)
+    assert hit["payload"] == {"required_skills": ["Python"]}
+    assert hit["audit"]["exact"] and hit["audit"]["similarity"] == 1.0
+    assert cache.lookup("Registered nurse for an intensive care unit, night shifts, patient charting.") is None
+
+RESUME = " ".join(
+    f"Built service{i} in Python with PostgreSQL, Docker and Kubernetes for team{i}." for i in range(40)
+)
+SOFTWARE_JOB = "Backend engineer: Python, PostgreSQL, Docker, Kubernetes, AWS, code review, on-call."
+NURSING_JOB = "Registered nurse for an intensive care unit: patient charting, medication, night shifts."
+
+def test_pair_needs_every_field_to_match():
+    cache = NearDuplicateCache(TextProcessor(), threshold=0.8)
+    cache.store({"analysis": "software"}, RESUME, SOFTWARE_JOB)
+    # The long resume alone would dominate a single combined signature
+    assert cache.lookup(RESUME, NURSING_JOB) is None
+    hit = cache.lookup(RESUME + " Reference 7", SOFTWARE_JOB)
+    assert hit["payload"] == {"analysis": "software"}
+    assert not hit["audit"]["exact"]
+    assert hit["audit"]["field_similarity"][1] == 1.0
+    assert hit["audit"]["similarity"] == min(hit["audit"]["field_similarity"]) >= 0.8
+
+def test_field_count_must_match():
+    cache = NearDuplicateCache(TextProcessor(), threshold=0.8)
+    cache.store("pair", RESUME, SOFTWARE_JOB)
+    assert cache.lookup(RESUME) is None
+    cache.store("single", RESUME)
+    assert cache.lookup(RESUME)["payload"] == "single"
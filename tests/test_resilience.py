@@ -0,0 +1,165 @@
+import threading
+import time
+import pytest
+from utils.fake_llm import FakeLLM
+from utils.model_router import ModelRouter
+from utils.resilience import Resilience, StageTimeout, CircuitOpenError, transient_cause
+from utils.stage_dag import StageCancelled, run_cancellable
+
+def make_router(llm, **policy):
+    resilience = Resilience(**policy)
+    return ModelRouter.single(llm, resilience), resilience
+
+def test_timeout():
+    router, resilience = make_router(FakeLLM(latency=2.0), timeout=0.1, hedge_percentile=None)
+    start = time.perf_counter()
+    with pytest.raises(StageTimeout):
+        router.invoke("extract_skills", lambda cancel: router.get("extract_skills")._call("prompt"))
+    assert time.perf_counter() - start < 0.5
+    assert resilience.counts["extract_skills"] == {"timeouts": 1}
+
+def test_timeout_counts_only_time_on_the_call():
+    # More concurrent calls than any fixed pool would hold; none should wait for a slot
+    llm = FakeLLM(latency=0.3)
+    router, resilience = make_router(llm, timeout=0.5, hedge_percentile=None)
+    errors = []
+
+    def call():
+        try:
+            router.invoke("extract_skills", lambda cancel: llm._call("prompt"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(64)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert llm.calls == 64
+
+def test_hedge_wins_over_slow_call():
+    slow = FakeLLM(slow_rate=1.0, slow_latency=2.0)
+    fast = FakeLLM(latency=0.01)
+    router, resilience = make_router(slow, timeout=1.0, hedge_percentile=95)
+    for _ in range(5):
+        router.record("extract_skills", 0.05)
+    attempts = []
+
+    def call(cancel):
+        attempts.append(1)
+        return (slow if len(attempts) == 1 else fast)._call('Return format: {"tone": ""}')
+
+    start = time.perf_counter()
+    assert router.invoke("extract_skills", call) == '{"tone": "Professional and enthusiastic"}'
+    assert time.perf_counter() - start < 0.5
+    assert resilience.counts["extract_skills"] == {"hedges": 1, "hedge_wins": 1}
+    assert resilience.breaker_for("extract_skills").state == "closed"
+
+def test_losing_hedge_is_cancelled():
+    slow = FakeLLM(latency=2.0)
+    fast = FakeLLM(latency=0.01)
+    router, resilience = make_router(slow, timeout=1.0, hedge_percentile=95)
+    for _ in range(5):
+        router.record("extract_skills", 0.05)
+    attempts = []
+
+    def call(cancel):
+        attempts.append(cancel)
+        llm = slow if len(attempts) == 1 else fast
+        return run_cancellable(lambda: llm._acall('Return format: {"tone": ""}'), cancel)
+
+    assert router.invoke("extract_skills", call) == '{"tone": "Professional and enthusiastic"}'
+    assert attempts[0].is_set() and not attempts[1].is_set()
+    time.sleep(0.3)
+    # The slow call stopped instead of running out its two seconds
+    assert (slow.calls, slow.cancelled) == (1, 1)
+    assert (fast.calls, fast.cancelled) == (1, 0)
+    # Only the winner's latency was recorded
+    assert router.latency_summary()["extract_skills"]["calls"] == 6
+
+def test_timed_out_attempt_is_cancelled():
+    llm = FakeLLM(latency=2.0)
+    router, resilience = make_router(llm, timeout=0.1, hedge_percentile=None)
+    with pytest.raises(StageTimeout):
+        router.invoke("extract_skills", lambda cancel: run_cancellable(lambda: llm._acall("prompt"), cancel))
+    time.sleep(0.3)
+    assert llm.cancelled == 1
+
+def test_attempts_follow_the_run_cancel_event():
+    llm = FakeLLM(latency=2.0)
+    router, resilience = make_router(llm, timeout=5.0, hedge_percentile=None)
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+    start = time.perf_counter()
+    with pytest.raises(StageCancelled):
+        router.invoke("extract_skills", lambda cancel: run_cancellable(lambda: llm._acall("prompt"), cancel),
+                      cancel_event)
+    assert time.perf_counter() - start < 1.0
+    assert llm.cancelled == 1
+    assert resilience.breaker_for("extract_skills").failures == 0
+
+def test_breaker_trips_and_half_open_trial():
+    llm = FakeLLM(error_rate=1.0)
+    router, resilience = make_router(llm, timeout=1.0, hedge_percentile=None,
+                                     failure_threshold=2, reset_seconds=0.2)
+    breaker = resilience.breaker_for("extract_skills")
+
+    def call():
+        return router.invoke("extract_skills", lambda cancel: llm._call("prompt"))
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="Injected"):
+            call()
+    assert breaker.state == "open" and breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        call()
+    assert llm.calls == 2
+
+    # A failed trial re-opens the breaker
+    time.sleep(0.25)
+    with pytest.raises(RuntimeError, match="Injected"):
+        call()
+    assert breaker.state == "open" and breaker.trips == 2
+    with pytest.raises(CircuitOpenError):
+        call()
+
+    # A successful trial closes it
+    time.sleep(0.25)
+    llm.error_rate = 0.0
+    call()
+    assert breaker.state == "closed"
+    call()
+    assert llm.calls == 5
+    assert resilience.summary()["routes"]["extract_skills"] == {"breaker_trips": 2, "short_circuited": 2}
+
+def test_cancelled_call_does_not_count_against_the_breaker():
+    router, resilience = make_router(FakeLLM(), failure_threshold=1, hedge_percentile=None)
+
+    def cancelled(cancel):
+        raise StageCancelled("extract_skills")
+
+    with pytest.raises(StageCancelled):
+        router.invoke("extract_skills", cancelled)
+    assert resilience.breaker_for("extract_skills").state == "closed"
+
+def test_only_timeouts_open_circuits_and_provider_errors_are_transient():
+    assert transient_cause(StageTimeout("extract_skills")) == "timeout"
+    assert transient_cause(CircuitOpenError("extract_skills")) == "circuit_open"
+    assert transient_cause(RuntimeError("bug")) is None
+    assert transient_cause(StageCancelled("extract_skills")) is None
+
+def test_provider_errors_are_transient_but_client_errors_are_not():
+    openai = pytest.importorskip("openai")
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("POST", "http://localhost/v1/chat/completions")
+
+    def status_error(cls, status):
+        return cls("error", response=httpx.Response(status, request=request), body=None)
+
+    assert transient_cause(openai.APITimeoutError(request=request)) == "timeout"
+    assert transient_cause(openai.APIConnectionError(request=request)) == "provider_error"
+    assert transient_cause(status_error(openai.RateLimitError, 429)) == "provider_error"
+    assert transient_cause(status_error(openai.InternalServerError, 500)) == "provider_error"
+    assert transient_cause(status_error(openai.AuthenticationError, 401)) is None
+    assert transient_cause(status_error(openai.BadRequestError, 400)) is None
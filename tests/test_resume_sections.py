@@ -0,0 +1,60 @@
+from utils.resume_sections import parse_resume, experience_is_complete, render_sections
+
+RESUME = """JANE SMITH
+Data Engineer
+jane@example.com | (555) 987-6543
+
+SUMMARY
+Data engineer building batch and streaming pipelines.
+
+TECHNICAL SKILLS
+• Languages: Python, SQL
+• Tools: Airflow; Spark
+
+EXPERIENCE
+Data Engineer
+Acme Analytics | March 2021 - Present
+• Built Airflow pipelines for reporting
+• Cut warehouse costs by 20%
+
+EDUCATION
+BSc Computer Science
+
+CERTIFICATIONS
+AWS Certified Data Analytics
+"""
+
+def test_parse_sections():
+    sections = parse_resume(RESUME)
+    assert sections["contact"]["name"] == "JANE SMITH"
+    assert sections["contact"]["headline"] == "Data Engineer"
+    assert sections["contact"]["emails"] == ["jane@example.com"]
+    assert sections["summary"] == "Data engineer building batch and streaming pipelines."
+    assert sections["skills"] == ["Python", "SQL", "Airflow", "Spark"]
+    assert sections["education"] == ["BSc Computer Science"]
+    assert sections["other"] == {"Certifications": ["AWS Certified Data Analytics"]}
+
+def test_parse_experience():
+    sections = parse_resume(RESUME)
+    assert sections["experience"] == [{
+        "company": "Acme Analytics",
+        "title": "Data Engineer",
+        "dates": "March 2021 - Present",
+        "responsibilities": ["Built Airflow pipelines for reporting", "Cut warehouse costs by 20%"],
+    }]
+    assert experience_is_complete(sections)
+
+def test_incomplete_experience():
+    sections = parse_resume(RESUME.replace("Acme Analytics | March 2021 - Present\n", ""))
+    assert not experience_is_complete(sections)
+
+def test_parse_returns_a_copy():
+    parse_resume(RESUME)["skills"].append("Cobol")
+    assert "Cobol" not in parse_resume(RESUME)["skills"]
+
+def test_render_only_requested_sections():
+    text = render_sections(parse_resume(RESUME), ["skills", "experience"])
+    assert text.startswith("SKILLS\nPython, SQL, Airflow, Spark")
+    assert "Data Engineer | Acme Analytics | March 2021 - Present" in text
+    assert "- Cut warehouse costs by 20%" in text
+    assert "SUMMARY" not in text
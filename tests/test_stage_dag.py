@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+from utils.stage_dag import StageGraph, StageCancelled, LinkedEvent, run_cancellable
+
+def test_stages_receive_dependency_results():
+    graph = StageGraph()
+    graph.add("a", lambda results: 1)
+    graph.add("b", lambda results: 2)
+    graph.add("sum", lambda results: results["a"] + results["b"], deps=["a", "b"])
+    assert graph.run() == {"a": 1, "b": 2, "sum": 3}
+    assert set(graph.timings) == {"a", "b", "sum"}
+
+def test_independent_stages_run_in_parallel():
+    graph = StageGraph()
+    for name in ("a", "b", "c"):
+        graph.add(name, lambda results: time.sleep(0.2))
+    start = time.perf_counter()
+    graph.run()
+    assert time.perf_counter() - start < 0.5
+
+def test_iter_run_yields_in_completion_order():
+    graph = StageGraph()
+    graph.add("slow", lambda results: time.sleep(0.2) or "slow")
+    graph.add("fast", lambda results: "fast")
+    assert [name for name, _ in graph.iter_run()] == ["fast", "slow"]
+
+def test_unknown_dependency_and_cycle_are_rejected():
+    graph = StageGraph()
+    graph.add("a", lambda results: 1, deps=["missing"])
+    with pytest.raises(ValueError):
+        graph.run()
+    graph = StageGraph()
+    graph.add("a", lambda results: 1, deps=["b"])
+    graph.add("b", lambda results: 1, deps=["a"])
+    with pytest.raises(ValueError):
+        graph.run()
+
+def test_stage_error_is_raised_and_cancels_the_rest():
+    graph = StageGraph()
+    graph.add("bad", lambda results: 1 / 0)
+    graph.add("after", lambda results: 1, deps=["bad"])
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
+    assert "after" not in graph.results
+    assert graph.cancelled
+
+def test_deadline_returns_finished_stages():
+    graph = StageGraph()
+    graph.add("fast", lambda results: "done")
+    graph.add("slow", lambda results: time.sleep(1.0))
+    start = time.perf_counter()
+    results = graph.run(deadline_at=start + 0.2)
+    assert time.perf_counter() - start < 0.6
+    assert results == {"fast": "done"}
+    assert graph.expired
+
+def test_cancel_from_another_thread():
+    graph = StageGraph()
+    graph.add("slow", lambda results: time.sleep(0.5))
+    graph.add("after", lambda results: 1, deps=["slow"])
+    threading.Timer(0.1, graph.cancel).start()
+    with pytest.raises(StageCancelled):
+        graph.run()
+    assert "after" not in graph.results
+
+def test_wall_clock_seconds_spans_the_run():
+    graph = StageGraph()
+    graph.add("a", lambda results: time.sleep(0.1))
+    graph.add("b", lambda results: time.sleep(0.1), deps=["a"])
+    graph.run()
+    assert 0.2 <= graph.wall_clock_seconds() < 0.4
+
+async def _answer(delay):
+    import asyncio
+    await asyncio.sleep(delay)
+    return "answer"
+
+def test_run_cancellable_returns_the_result():
+    assert run_cancellable(lambda: _answer(0.01), threading.Event()) == "answer"
+    assert run_cancellable(lambda: _answer(0.01), None) == "answer"
+
+def test_run_cancellable_stops_a_call_in_flight():
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+    start = time.perf_counter()
+    with pytest.raises(StageCancelled):
+        run_cancellable(lambda: _answer(5.0), cancel_event)
+    assert time.perf_counter() - start < 1.0
+
+def test_heartbeat_yields_while_a_stage_runs():
+    graph = StageGraph()
+    graph.add("slow", lambda results: time.sleep(0.35) or "done")
+    events = list(graph.iter_run(heartbeat=True))
+    assert events[-1] == ("slow", "done")
+    assert len(events) >= 3 and set(events[:-1]) == {(None, None)}
+
+def test_closing_on_a_heartbeat_cancels_the_run():
+    graph = StageGraph()
+    graph.add("slow", lambda results: time.sleep(0.3))
+    graph.add("after", lambda results: 1, deps=["slow"])
+    events = graph.iter_run(heartbeat=True)
+    assert next(events) == (None, None)
+    events.close()
+    assert graph.cancelled
+    time.sleep(0.4)
+    assert "after" not in graph.results
+
+def test_linked_event_follows_its_parent_but_not_the_other_way():
+    parent = threading.Event()
+    first, second = LinkedEvent(parent), LinkedEvent(parent)
+    first.set()
+    assert first.is_set() and not second.is_set() and not parent.is_set()
+    parent.set()
+    assert second.is_set()
+    assert not LinkedEvent().is_set()
@@ -0,0 +1,29 @@
+import pytest
+from utils.text_processor import TextProcessor
+
+DOCUMENTS = [f"Document {i}: Python, SQL & Docker!" for i in range(50)]
+
+@pytest.fixture(scope="module")
+def processor():
+    return TextProcessor()
+
+def test_process_many_keeps_input_order(processor):
+    results = list(processor.process_many(DOCUMENTS, "clean_text", workers=2, chunk_size=3, max_pending_chunks=2))
+    assert results == [TextProcessor.clean_text(document) for document in DOCUMENTS]
+
+def test_process_many_reads_a_file(processor, tmp_path):
+    path = tmp_path / "documents.txt"
+    path.write_text("\n".join(DOCUMENTS) + "\n", encoding="utf-8")
+    results = list(processor.process_many(str(path), "clean_text", workers=2, chunk_size=7))
+    assert results == [TextProcessor.clean_text(document) for document in DOCUMENTS]
+
+def test_extract_keywords_many_matches_serial(processor):
+    results = list(processor.extract_keywords_many(DOCUMENTS[:10], min_length=4, workers=2, chunk_size=4))
+    assert [sorted(r) for r in results] == [sorted(processor.extract_keywords(d, min_length=4)) for d in DOCUMENTS[:10]]
+
+def test_process_many_handles_empty_input(processor):
+    assert list(processor.process_many([], workers=1)) == []
+
+def test_process_many_rejects_other_methods(processor):
+    with pytest.raises(ValueError):
+        list(processor.process_many(DOCUMENTS, "calculate_similarity"))
@@ -1,12 +1,42 @@
 import re
-from typing import List, Dict
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import os
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+# Methods that take one document and can be fanned out by process_many
+BATCH_METHODS = ("clean_text", "extract_keywords", "extract_skills", "format_bullet_points")
+
+# Per-worker processor, built once by the pool initializer so NLTK loads once per process
+_worker_processor = None
+
+def _init_worker() -> None:
+    """Create the TextProcessor used by this worker process."""
+    global _worker_processor
+    _worker_processor = TextProcessor()
+
+def _process_chunk(method: str, documents: List[str], kwargs: Dict[str, Any]) -> List[Any]:
+    """Apply a TextProcessor method to every document in a chunk."""
+    func = getattr(_worker_processor, method)
+    return [func(document, **kwargs) for document in documents]
+
+def iter_documents(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Yield documents from an iterable, or from a file path with one document per line."""
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield line.rstrip('\n')
+    else:
+        yield from source
 
 class TextProcessor:
     def __init__(self):
+        # NLTK is imported here rather than at module load; it is slow to import
+        import nltk
+        from nltk.tokenize import word_tokenize
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        
         # Download required NLTK data
         try:
             nltk.data.find('tokenizers/punkt')
@@ -17,10 +47,12 @@ class TextProcessor:
             nltk.download('stopwords')
             nltk.download('wordnet')
         
+        self.word_tokenize = word_tokenize
         self.lemmatizer = WordNetLemmatizer()
         self.stop_words = set(stopwords.words('english'))
     
-    def clean_text(self, text: str) -> str:
+    @staticmethod
+    def clean_text(text: str) -> str:
         """Clean and normalize text."""
         # Convert to lowercase
         text = text.lower()
@@ -37,7 +69,7 @@ class TextProcessor:
         cleaned_text = self.clean_text(text)
         
         # Tokenize
-        tokens = word_tokenize(cleaned_text)
+        tokens = self.word_tokenize(cleaned_text)
         
         # Remove stopwords and short words
         keywords = [
@@ -48,6 +80,43 @@ class TextProcessor:
         
         return list(set(keywords))
     
+    def process_many(self, documents: Union[str, Iterable[str]], method: str = "extract_keywords",
+                     workers: int = None, chunk_size: int = 256, max_pending_chunks: int = None,
+                     **kwargs) -> Iterator[Any]:
+        """Apply a single-document method to a stream of documents across a process pool.
+        
+        Documents come from an iterable or a file with one document per line and
+        are sent to workers in chunks. Results are yielded in input order, and at
+        most max_pending_chunks chunks are in flight, so memory stays bounded
+        however large the corpus is. Each worker builds its own TextProcessor once.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        if method not in BATCH_METHODS:
+            raise ValueError(f"Unsupported method for process_many: {method}")
+        workers = workers or os.cpu_count() or 1
+        max_pending_chunks = max_pending_chunks or workers * 2
+        documents = iter_documents(documents)
+        
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        pending = deque()
+        try:
+            while True:
+                chunk = list(islice(documents, chunk_size))
+                if chunk:
+                    pending.append(executor.submit(_process_chunk, method, chunk, kwargs))
+                # Drain the oldest chunk once the window is full, or everything at the end
+                while pending and (len(pending) >= max_pending_chunks or not chunk):
+                    yield from pending.popleft().result()
+                if not chunk:
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def extract_keywords_many(self, documents: Union[str, Iterable[str]], min_length: int = 3,
+                              **options) -> Iterator[List[str]]:
+        """Extract keywords from many documents in parallel; see process_many for options."""
+        return self.process_many(documents, "extract_keywords", min_length=min_length, **options)
+    
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts using Jaccard similarity."""
         # Extract keywords from both texts
@@ -94,7 +163,8 @@ class TextProcessor:
         
         return categorized_skills
     
-    def format_bullet_points(self, text: str) -> List[str]:
+    @staticmethod
+    def format_bullet_points(text: str) -> List[str]:
         """Format text into bullet points."""
         # Split text into sentences
         sentences = re.split(r'[.!?]+', text)
@@ -110,6 +180,46 @@ class TextProcessor:
         
         return bullet_points
     
+    @staticmethod
+    def extract_emails(text: str) -> List[str]:
+        """Extract email addresses from text."""
+        return re.findall(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+', text)
+    
+    @staticmethod
+    def extract_phone_numbers(text: str) -> List[str]:
+        """Extract phone numbers from text."""
+        matches = re.findall(r'\+?\d?[\s.-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', text)
+        return [m.strip() for m in matches]
+    
+    @staticmethod
+    def extract_urls(text: str) -> List[str]:
+        """Extract web and profile links from text."""
+        return re.findall(
+            r'(?:https?://)?(?:www\.)?(?:[\w-]+\.)+(?:com|org|net|io|dev|me|in)(?:/[\w./-]*)?',
+            text
+        )
+    
+    @staticmethod
+    def is_bullet(line: str) -> bool:
+        """Check whether a line is a bullet point."""
+        return bool(re.match(r'^\s*(?:[•·▪◦*-]|\d+[.)])\s+', line))
+    
+    @staticmethod
+    def strip_bullet(line: str) -> str:
+        """Remove a leading bullet marker from a line."""
+        return re.sub(r'^\s*(?:[•·▪◦*-]|\d+[.)])\s+', '', line).strip()
+    
+    @staticmethod
+    def find_date_range(text: str) -> str:
+        """Find a date range such as 'June 2020 - December 2021' or '2016 - Present'."""
+        date = r'(?:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+)?\d{4}|(?:\d{1,2}/)?\d{4}'
+        match = re.search(
+            rf'(?:{date})\s*(?:-|–|—|to)\s*(?:{date}|Present|Current|Now)|(?:{date})',
+            text,
+            re.IGNORECASE
+        )
+        return match.group(0).strip() if match else ""
+    
     def optimize_for_ats(self, text: str, keywords: List[str]) -> str:
         """Optimize text for ATS systems."""
         # Clean text